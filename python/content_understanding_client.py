@@ -1,15 +1,28 @@
+import aiohttp
+import asyncio
 import base64
-import json
+import hashlib
+import io
 import logging
+import mmap
+import orjson
 import os
+import random
 import requests
+import shutil
+import tempfile
 import time
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from itertools import islice
+from requests.adapters import HTTPAdapter
 from requests.models import Response
-from typing import Any, Dict, List, Optional
+from typing import IO, Any, Awaitable, Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
 from pathlib import Path
+from urllib3.util.retry import Retry
 
 from azure.identity import DefaultAzureCredential
 from azure.storage.blob import (
@@ -21,6 +34,17 @@ from azure.storage.blob.aio import ContainerClient
 
 
 POLL_TIMEOUT_SECONDS = 120
+POLL_INITIAL_INTERVAL_SECONDS = 0.25
+POLL_MAX_INTERVAL_SECONDS = 10
+MAX_CONCURRENT_ANALYZE = 4
+MAX_CONCURRENT_UPLOAD = 16
+ANALYZE_CACHE_DIR = os.getenv("CU_CACHE_DIR", "~/.cu_cache")
+ANALYZE_CACHE_EXPIRY_SECONDS = 7 * 24 * 3600
+BASE64_ENCODE_CHUNK_SIZE = 3 << 20  # multiple of 3, so encoded chunks concatenate without padding
+SPOOLED_PAYLOAD_MAX_MEMORY_SIZE = 64 << 20
+SPOOLED_ENCODED_FILE_MAX_MEMORY_SIZE = 8 << 20
+MAX_FILE_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+MMAP_MIN_FILE_SIZE = 1 << 20
 
 
 @dataclass
@@ -40,7 +64,7 @@ class AzureContentUnderstandingClient:
     SAS_EXPIRY_HOURS: int = 1
 
     # https://learn.microsoft.com/en-us/azure/ai-services/content-understanding/service-limits#document-and-text
-    SUPPORTED_FILE_TYPES_DOCUMENT_TXT: List[str] = [
+    SUPPORTED_FILE_TYPES_DOCUMENT_TXT: FrozenSet[str] = frozenset({
         ".pdf",
         ".tiff",
         ".jpg",
@@ -57,9 +81,9 @@ class AzureContentUnderstandingClient:
         ".eml",
         ".msg",
         ".xml",
-    ]
+    })
 
-    SUPPORTED_FILE_TYPES_DOCUMENT: List[str] = [
+    SUPPORTED_FILE_TYPES_DOCUMENT: FrozenSet[str] = frozenset({
         ".pdf",
         ".tiff",
         ".jpg",
@@ -67,7 +91,7 @@ class AzureContentUnderstandingClient:
         ".png",
         ".bmp",
         ".heif",
-    ]  # Pro mode and Training for Standard mode only support document data
+    })  # Pro mode and Training for Standard mode only support document data
 
     def __init__(
         self,
@@ -88,20 +112,53 @@ class AzureContentUnderstandingClient:
 
         self._endpoint = endpoint.rstrip("/")
         self._api_version = api_version
+        self._analyzers_url = f"{self._endpoint}/contentunderstanding/analyzers"
+        self._classifiers_url = f"{self._endpoint}/contentunderstanding/classifiers"
+        self._api_version_qs = f"?api-version={self._api_version}"
         self._logger = logging.getLogger(__name__)
 
-        token = token_provider() if token_provider else None
+        # The token is fetched for every request, instead of being frozen into the headers here
+        self._token_provider = None if subscription_key else token_provider
 
-        self._headers = self._get_headers(subscription_key, token, x_ms_useragent)
+        self._headers = self._get_headers(subscription_key, None, x_ms_useragent)
+        self._session = self._create_session(self._headers)
+        if self._token_provider:
+            self._session.auth = self._apply_auth
+        self._cache_dir = Path(ANALYZE_CACHE_DIR).expanduser()
 
-    def _get_analyzer_url(self, endpoint: str, api_version: str, analyzer_id: str) -> str:
-        return f"{endpoint}/contentunderstanding/analyzers/{analyzer_id}?api-version={api_version}"  # noqa
+    @staticmethod
+    def _create_session(headers: Dict[str, str]) -> requests.Session:
+        """Returns a session that keeps connections to the service alive between requests.
+        Args:
+            headers (dict): The headers to send with every request of the session.
+        Returns:
+            requests.Session: The session with a pooled and retrying HTTP adapter mounted.
+        """
+        session = requests.Session()
+        session.headers.update(headers)
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+                # hand the last response to raise_for_status(), so callers still get an HTTPError
+                raise_on_status=False,
+            ),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _get_analyzer_url(self, analyzer_id: str) -> str:
+        return f"{self._analyzers_url}/{analyzer_id}{self._api_version_qs}"
 
-    def _get_analyzer_list_url(self, endpoint: str, api_version: str) -> str:
-        return f"{endpoint}/contentunderstanding/analyzers?api-version={api_version}"
+    def _get_analyzer_list_url(self) -> str:
+        return f"{self._analyzers_url}{self._api_version_qs}"
 
-    def _get_analyze_url(self, endpoint: str, api_version: str, analyzer_id: str) -> str:
-        return f"{endpoint}/contentunderstanding/analyzers/{analyzer_id}:analyze?api-version={api_version}"  # noqa
+    def _get_analyze_url(self, analyzer_id: str) -> str:
+        return f"{self._analyzers_url}/{analyzer_id}:analyze{self._api_version_qs}"
 
     def _get_training_data_config(
         self, storage_container_sas_url: str, storage_container_path_prefix: str
@@ -122,11 +179,11 @@ class AzureContentUnderstandingClient:
             "fileListPath": self.KNOWLEDGE_SOURCE_LIST_FILE_NAME,
         }]
 
-    def _get_classifier_url(self, endpoint: str, api_version: str, classifier_id: str) -> str:
-        return f"{endpoint}/contentunderstanding/classifiers/{classifier_id}?api-version={api_version}"
+    def _get_classifier_url(self, classifier_id: str) -> str:
+        return f"{self._classifiers_url}/{classifier_id}{self._api_version_qs}"
 
-    def _get_classify_url(self, endpoint: str, api_version: str, classifier_id: str) -> str:
-        return f"{endpoint}/contentunderstanding/classifiers/{classifier_id}:classify?api-version={api_version}"
+    def _get_classify_url(self, classifier_id: str) -> str:
+        return f"{self._classifiers_url}/{classifier_id}:classify{self._api_version_qs}"
 
     def _get_headers(
         self, subscription_key: str, api_token: str, x_ms_useragent: str
@@ -139,14 +196,92 @@ class AzureContentUnderstandingClient:
         Returns:
             dict: A dictionary containing the headers for the HTTP requests.
         """
-        headers = (
-            {"Ocp-Apim-Subscription-Key": subscription_key}
-            if subscription_key
-            else {"Authorization": f"Bearer {api_token}"}
-        )
+        if subscription_key:
+            headers = {"Ocp-Apim-Subscription-Key": subscription_key}
+        elif api_token:
+            headers = {"Authorization": f"Bearer {api_token}"}
+        else:
+            headers = {}
         headers["x-ms-useragent"] = x_ms_useragent
         return headers
+
+    def _get_token(self) -> str:
+        """Returns the API token from the token provider.
+        The provider caches the token itself and refreshes it shortly before it expires, so it is cheap to call
+        for every request, while a second cache here could hand out a token after it expired.
+        Returns:
+            str: The API token for the service.
+        """
+        return self._token_provider()
+
+    def _get_auth_headers(self) -> Dict[str, str]:
+        """Returns the headers for a single HTTP request, including a fresh Authorization header
+        when the client authenticates with a token provider.
+        Returns:
+            dict: A dictionary containing the headers for the HTTP request.
+        """
+        if not self._token_provider:
+            return self._headers
+        return {**self._headers, "Authorization": f"Bearer {self._get_token()}"}
+
+    def _apply_auth(self, request: requests.PreparedRequest) -> requests.PreparedRequest:
+        """Attaches the Authorization header to every request sent through the session."""
+        request.headers["Authorization"] = f"Bearer {self._get_token()}"
+        return request
+
+    @staticmethod
+    def _get_polling_interval(
+        attempt: int,
+        response_headers: Any,
+        initial_interval_seconds: float,
+        max_interval_seconds: float,
+    ) -> float:
+        """Returns the number of seconds to wait before the next polling attempt.
+        The interval doubles with every attempt up to `max_interval_seconds` with a +/-20% jitter,
+        unless the service asks for a specific delay through the `Retry-After` header.
+        Args:
+            attempt (int): The zero-based number of the polling attempt.
+            response_headers (Mapping): The headers of the last polling response.
+            initial_interval_seconds (float): The interval of the first polling attempt.
+            max_interval_seconds (float): The upper bound of the interval.
+        Returns:
+            float: The number of seconds to wait.
+        """
+        retry_after = response_headers.get("Retry-After")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        interval = min(max_interval_seconds, initial_interval_seconds * 2 ** attempt)
+        return interval * random.uniform(0.8, 1.2)
     
+    @staticmethod
+    def _is_supported_ext(file_ext_lower: str, is_document: bool = False) -> bool:
+        """
+        Checks if the given lowercase file extension is supported, for callers that already
+        normalized the extension and confirmed that the path is a file.
+
+        Args:
+            file_ext_lower (str): The lowercase file extension to check.
+            is_document (bool): If True, checks against Document supported file types.
+
+        Returns:
+            bool: True if the file type is supported, False otherwise.
+        """
+        if is_document:
+            return file_ext_lower in AzureContentUnderstandingClient.SUPPORTED_FILE_TYPES_DOCUMENT
+        return file_ext_lower in AzureContentUnderstandingClient.SUPPORTED_FILE_TYPES_DOCUMENT_TXT
+
+    @staticmethod
+    def _get_file_ext_lower(filename: str) -> str:
+        """
+        Returns the lowercase extension of a file name, including the leading dot, or an empty string
+        if there is none. Like `os.path.splitext`, a leading dot (hidden file) does not start an extension.
+        """
+        dot = filename.rfind(".")
+        return filename[dot:].lower() if dot > 0 else ""
+
     @staticmethod
     def is_supported_doc_type_by_file_ext(file_ext: str, is_document: bool=False) -> bool:
         """
@@ -159,11 +294,7 @@ class AzureContentUnderstandingClient:
         Returns:
             bool: True if the file type is supported, False otherwise.
         """
-        supported_types = (
-            AzureContentUnderstandingClient.SUPPORTED_FILE_TYPES_DOCUMENT
-            if is_document else AzureContentUnderstandingClient.SUPPORTED_FILE_TYPES_DOCUMENT_TXT
-        )
-        return file_ext.lower() in supported_types
+        return AzureContentUnderstandingClient._is_supported_ext(file_ext.lower(), is_document)
     
     @staticmethod
     def is_supported_doc_type_by_file_path(file_path: Path, is_document: bool=False) -> bool:
@@ -179,8 +310,33 @@ class AzureContentUnderstandingClient:
         """
         if not file_path.is_file():
             return False
-        file_ext = file_path.suffix.lower()
-        return AzureContentUnderstandingClient.is_supported_doc_type_by_file_ext(file_ext, is_document)
+        return AzureContentUnderstandingClient._is_supported_ext(file_path.suffix.lower(), is_document)
+
+    @staticmethod
+    def _walk_files(folder: str) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+        """
+        Walks the given folder top-down like `os.walk`, but yields the files of each directory as
+        `os.DirEntry` objects, whose file type comes from the directory listing without extra `stat` calls.
+
+        Args:
+            folder (str): The local path to the folder to walk.
+
+        Returns:
+            Iterator[Tuple[str, List[os.DirEntry]]]: The path of each directory and the entries of its files.
+        """
+        pending_dirs = [folder]
+        while pending_dirs:
+            dirpath = pending_dirs.pop()
+            file_entries: List[os.DirEntry] = []
+            sub_dirs: List[str] = []
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        sub_dirs.append(entry.path)
+                    elif entry.is_file():
+                        file_entries.append(entry)
+            yield dirpath, file_entries
+            pending_dirs.extend(reversed(sub_dirs))
 
     @staticmethod
     def generate_temp_container_sas_url(
@@ -240,12 +396,11 @@ class AzureContentUnderstandingClient:
         Raises:
             requests.exceptions.HTTPError: If the HTTP request returned an unsuccessful status code.
         """
-        response = requests.get(
-            url=self._get_analyzer_list_url(self._endpoint, self._api_version),
-            headers=self._headers,
+        response = self._session.get(
+            url=self._get_analyzer_list_url(),
         )
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
 
     def get_analyzer_detail_by_id(self, analyzer_id: str) -> Dict[str, Any]:
         """
@@ -261,12 +416,11 @@ class AzureContentUnderstandingClient:
         Raises:
             HTTPError: If the request fails.
         """
-        response = requests.get(
-            url=self._get_analyzer_url(self._endpoint, self._api_version, analyzer_id),
-            headers=self._headers,
+        response = self._session.get(
+            url=self._get_analyzer_url(analyzer_id),
         )
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
 
     def begin_create_analyzer(
         self,
@@ -296,8 +450,7 @@ class AzureContentUnderstandingClient:
             requests.Response: The response object from the HTTP request.
         """
         if analyzer_template_path and Path(analyzer_template_path).exists():
-            with open(analyzer_template_path, "r") as file:
-                analyzer_template = json.load(file)
+            analyzer_template = orjson.loads(Path(analyzer_template_path).read_bytes())
 
         if not analyzer_template:
             raise ValueError("Analyzer schema must be provided.")
@@ -325,12 +478,11 @@ class AzureContentUnderstandingClient:
             )
 
         headers = {"Content-Type": "application/json"}
-        headers.update(self._headers)
 
-        response = requests.put(
-            url=self._get_analyzer_url(self._endpoint, self._api_version, analyzer_id),
+        response = self._session.put(
+            url=self._get_analyzer_url(analyzer_id),
             headers=headers,
-            json=analyzer_template,
+            data=orjson.dumps(analyzer_template),
         )
         response.raise_for_status()
         self._logger.info(f"Analyzer {analyzer_id} create request accepted.")
@@ -349,9 +501,8 @@ class AzureContentUnderstandingClient:
         Raises:
             HTTPError: If the delete request fails.
         """
-        response = requests.delete(
-            url=self._get_analyzer_url(self._endpoint, self._api_version, analyzer_id),
-            headers=self._headers,
+        response = self._session.delete(
+            url=self._get_analyzer_url(analyzer_id),
         )
         response.raise_for_status()
         self._logger.info(f"Analyzer {analyzer_id} deleted.")
@@ -377,20 +528,12 @@ class AzureContentUnderstandingClient:
         if file_path.exists():
             if file_path.is_dir():
                 # Only Pro mode supports multiple input files
-                data = {
-                    "inputs": [
-                        {
-                            "name": "_".join(f.relative_to(file_path).parts),  # flatten the relative file path into a single string using underscores
-                            "data": base64.b64encode(f.read_bytes()).decode("utf-8")
-                        }
-                        for f in file_path.rglob("*")
-                        if f.is_file() and self.is_supported_doc_type_by_file_path(f, is_document=True)
-                    ]
-                }
+                data = tempfile.SpooledTemporaryFile(max_size=SPOOLED_PAYLOAD_MAX_MEMORY_SIZE)
+                self._write_inputs_payload(file_path, data)
+                data.seek(0)
                 headers = {"Content-Type": "application/json"}
             elif file_path.is_file():
-                with open(file_location, "rb") as file:
-                    data = file.read()
+                data = open(file_location, "rb")
                 headers = {"Content-Type": "application/octet-stream"}
             else:
                 raise ValueError("File location must be a valid and supported file or directory path.")
@@ -400,23 +543,20 @@ class AzureContentUnderstandingClient:
         else:
             raise ValueError("File location must be a valid path or URL.")
 
-        headers.update(self._headers)
         if isinstance(data, dict):
-            response = requests.post(
-                url=self._get_analyze_url(
-                    self._endpoint, self._api_version, analyzer_id
-                ),
+            response = self._session.post(
+                url=self._get_analyze_url(analyzer_id),
                 headers=headers,
-                json=data,
+                data=orjson.dumps(data),
             )
         else:
-            response = requests.post(
-                url=self._get_analyze_url(
-                    self._endpoint, self._api_version, analyzer_id
-                ),
-                headers=headers,
-                data=data,
-            )
+            # Stream the file content from disk instead of loading it into memory
+            with data:
+                response = self._session.post(
+                    url=self._get_analyze_url(analyzer_id),
+                    headers=headers,
+                    data=data,
+                )
 
         response.raise_for_status()
         self._logger.info(
@@ -424,6 +564,70 @@ class AzureContentUnderstandingClient:
         )
         return response
     
+    def _write_inputs_payload(self, dir_path: Path, payload: IO[bytes]) -> None:
+        """
+        Writes the JSON request body for analyzing all supported files of a directory, encoding
+        each file to base64 chunk by chunk so that no file has to be fully loaded into memory.
+
+        Args:
+            dir_path (Path): The local path to the directory containing the input files.
+            payload (IO[bytes]): The binary stream to write the request body to.
+        """
+        payload.write(b'{"inputs":[')
+        input_files = [
+            entry.path
+            for _, file_entries in self._walk_files(str(dir_path))
+            for entry in file_entries
+            if self._is_supported_ext(self._get_file_ext_lower(entry.name), is_document=True)
+        ]
+        # Read and encode the files concurrently, while keeping their order in the payload
+        # Only MAX_FILE_IO_WORKERS files are encoded ahead of the one being written, so that
+        # the encoded files waiting to be written never pile up in memory
+        remaining_files = iter(input_files)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=MAX_FILE_IO_WORKERS) as executor:
+            try:
+                for f in islice(remaining_files, MAX_FILE_IO_WORKERS):
+                    pending.append((f, executor.submit(self._encode_file_to_base64, f)))
+                index = 0
+                while pending:
+                    f, encoded_future = pending.popleft()
+                    next_file = next(remaining_files, None)
+                    if next_file is not None:
+                        pending.append((next_file, executor.submit(self._encode_file_to_base64, next_file)))
+                    if index > 0:
+                        payload.write(b",")
+                    name = "_".join(Path(os.path.relpath(f, dir_path)).parts)  # flatten the relative file path into a single string using underscores
+                    payload.write(b'{"name":' + orjson.dumps(name) + b',"data":"')
+                    with encoded_future.result() as encoded_file:
+                        shutil.copyfileobj(encoded_file, payload)
+                    payload.write(b'"}')
+                    index += 1
+            finally:
+                # close the encoded files that were not written, e.g., after a failed read or write
+                for _, encoded_future in pending:
+                    if not encoded_future.cancel() and encoded_future.exception() is None:
+                        encoded_future.result().close()
+        payload.write(b"]}")
+
+    @staticmethod
+    def _encode_file_to_base64(file_path: str) -> IO[bytes]:
+        """
+        Encodes a file to base64 chunk by chunk into a spooled temporary file.
+
+        Args:
+            file_path (str): The local path to the file to encode.
+
+        Returns:
+            IO[bytes]: The base64-encoded content, positioned at its start.
+        """
+        encoded_file = tempfile.SpooledTemporaryFile(max_size=SPOOLED_ENCODED_FILE_MAX_MEMORY_SIZE)
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(BASE64_ENCODE_CHUNK_SIZE), b""):
+                encoded_file.write(base64.b64encode(chunk))
+        encoded_file.seek(0)
+        return encoded_file
+
     def get_prebuilt_document_analyze_result(self, file_location: str) -> Dict[str, Any]:
         response = self.begin_analyze(
             analyzer_id=self.PREBUILT_DOCUMENT_ANALYZER_ID,
@@ -432,6 +636,182 @@ class AzureContentUnderstandingClient:
         
         return self.poll_result(response, timeout_seconds=POLL_TIMEOUT_SECONDS)
     
+    async def _begin_analyze_async(
+        self, session: aiohttp.ClientSession, analyzer_id: str, file_location: str
+    ) -> str:
+        """
+        Begins the analysis of a local file without blocking the event loop.
+
+        Args:
+            session (aiohttp.ClientSession): The shared HTTP session to send the request with.
+            analyzer_id (str): The ID of the analyzer to use.
+            file_location (str): The local path to the file to analyze.
+
+        Returns:
+            str: The operation location to poll for the analyze result.
+
+        Raises:
+            ValueError: If the operation location is not found in the response headers.
+            aiohttp.ClientResponseError: If the HTTP request returned an unsuccessful status code.
+        """
+        headers = {"Content-Type": "application/octet-stream"}
+        headers.update(self._get_auth_headers())
+
+        # aiohttp reads file payloads chunk by chunk in an executor, without blocking the event loop
+        with open(file_location, "rb") as data:
+            async with session.post(
+                url=self._get_analyze_url(analyzer_id),
+                headers=headers,
+                data=data,
+            ) as response:
+                response.raise_for_status()
+                operation_location = response.headers.get("operation-location", "")
+        if not operation_location:
+            raise ValueError("Operation location not found in response headers.")
+        self._logger.info(
+            f"Analyzing file {file_location} with analyzer: {analyzer_id}"
+        )
+        return operation_location
+
+    async def _poll_result_async(
+        self,
+        session: aiohttp.ClientSession,
+        operation_location: str,
+        timeout_seconds: int = POLL_TIMEOUT_SECONDS,
+        polling_interval_seconds: float = POLL_INITIAL_INTERVAL_SECONDS,
+        max_polling_interval_seconds: float = POLL_MAX_INTERVAL_SECONDS,
+    ) -> Dict[str, Any]:
+        """
+        Polls the result of an asynchronous operation with `asyncio.sleep`, so other
+        analyze requests and blob uploads can make progress in the meantime.
+
+        Args:
+            session (aiohttp.ClientSession): The shared HTTP session to send the requests with.
+            operation_location (str): The operation location returned by the analyze request.
+            timeout_seconds (int, optional): The maximum number of seconds to wait for the operation to complete. Defaults to 120.
+            polling_interval_seconds (float, optional): The number of seconds to wait before the second polling attempt,
+                doubled after every attempt. Defaults to 0.25.
+            max_polling_interval_seconds (float, optional): The maximum number of seconds to wait between polling attempts. Defaults to 10.
+
+        Raises:
+            TimeoutError: If the operation does not complete within the specified timeout.
+            RuntimeError: If the operation fails.
+
+        Returns:
+            dict: The JSON response of the completed operation if it succeeds.
+        """
+        operation_id = operation_location.split("/")[-1].split("?")[0]
+        start_time = time.time()
+        attempt = 0
+        while True:
+            elapsed_time = time.time() - start_time
+            if elapsed_time > timeout_seconds:
+                raise TimeoutError(
+                    f"Operation timed out after {timeout_seconds:.2f} seconds."
+                )
+
+            async with session.get(operation_location, headers=self._get_auth_headers()) as response:
+                response.raise_for_status()
+                result = orjson.loads(await response.read())
+                response_headers = response.headers
+            status = result.get("status", "").lower()
+            if status == "succeeded":
+                self._logger.info(
+                    f"Request result is ready after {elapsed_time:.2f} seconds."
+                )
+                return result
+            elif status == "failed":
+                self._logger.error(f"Request failed. Reason: {result}")
+                raise RuntimeError("Request failed.")
+            else:
+                self._logger.info(
+                    f"Request {operation_id} in progress ..."
+                )
+            await asyncio.sleep(self._get_polling_interval(
+                attempt, response_headers, polling_interval_seconds, max_polling_interval_seconds
+            ))
+            attempt += 1
+
+    async def get_prebuilt_document_analyze_result_async(
+        self, session: aiohttp.ClientSession, file_location: str
+    ) -> Dict[str, Any]:
+        operation_location = await self._begin_analyze_async(
+            session,
+            analyzer_id=self.PREBUILT_DOCUMENT_ANALYZER_ID,
+            file_location=file_location,
+        )
+
+        return await self._poll_result_async(
+            session, operation_location, timeout_seconds=POLL_TIMEOUT_SECONDS
+        )
+
+    def _get_analyze_cache_path(self, analyzer_id: str, file_location: str) -> Path:
+        """
+        Returns the cache file path of the analyze result, keyed on the analyzer, the API version
+        and the SHA-256 of the file content.
+        """
+        hasher = hashlib.sha256(f"{analyzer_id}:{self._api_version}:".encode("utf-8"))
+        with open(file_location, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                hasher.update(chunk)
+        return self._cache_dir / f"{hasher.hexdigest()}.json"
+
+    def _read_analyze_cache(self, analyzer_id: str, file_location: str) -> Tuple[Path, Optional[Dict[str, Any]]]:
+        """
+        Looks up the cached analyze result of the file. Runs in a worker thread, as it hashes and reads files.
+
+        Returns:
+            Tuple[Path, Optional[dict]]: The cache file path, and the cached analyze result if an unexpired
+            and valid entry exists, otherwise None.
+        """
+        cache_path = self._get_analyze_cache_path(analyzer_id, file_location)
+        try:
+            if time.time() - cache_path.stat().st_mtime >= ANALYZE_CACHE_EXPIRY_SECONDS:
+                return cache_path, None
+            return cache_path, orjson.loads(cache_path.read_bytes())
+        except FileNotFoundError:
+            return cache_path, None
+        except orjson.JSONDecodeError:
+            # a corrupted entry is treated as a miss and removed, so that it is replaced by a fresh result
+            self._logger.warning(f"Ignoring corrupted cached analyze result {cache_path}")
+            cache_path.unlink(missing_ok=True)
+            return cache_path, None
+
+    @staticmethod
+    def _write_analyze_cache(cache_path: Path, analyze_result: Dict[str, Any]) -> None:
+        """
+        Stores the analyze result in the cache. Runs in a worker thread, as it writes files.
+        The result is written to a temporary file next to the cache file first and then renamed over it,
+        so that an interrupted write never leaves a truncated cache entry behind.
+        """
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_path.parent, prefix=cache_path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(orjson.dumps(analyze_result))
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    async def _analyze_cached(
+        self, session: aiohttp.ClientSession, file_location: str
+    ) -> Dict[str, Any]:
+        """
+        Returns the prebuilt document analyze result of the file from the local cache if an unexpired
+        entry exists, otherwise analyzes the file and stores the result in the cache.
+        """
+        cache_path, analyze_result = await asyncio.to_thread(
+            self._read_analyze_cache, self.PREBUILT_DOCUMENT_ANALYZER_ID, file_location
+        )
+        if analyze_result is not None:
+            self._logger.info(f"Using cached analyze result for {file_location}")
+            return analyze_result
+
+        analyze_result = await self.get_prebuilt_document_analyze_result_async(session, file_location)
+        await asyncio.to_thread(self._write_analyze_cache, cache_path, analyze_result)
+        return analyze_result
+
     async def _upload_file_to_blob(
         self, container_client: ContainerClient, file_path: str, target_blob_path: str
     ) -> None:
@@ -442,17 +822,21 @@ class AzureContentUnderstandingClient:
     async def _upload_json_to_blob(
         self, container_client: ContainerClient, data: Dict[str, Any], target_blob_path: str
     ) -> None:
-        json_str = json.dumps(data, indent=4)
-        json_bytes = json_str.encode('utf-8')
+        # The result blob is read by the service, not by people, so it is uploaded without indentation
+        json_bytes = orjson.dumps(data)
         await container_client.upload_blob(name=target_blob_path, data=json_bytes, overwrite=True)
         self._logger.info(f"Uploaded json to {target_blob_path}")
     
     async def upload_jsonl_to_blob(
         self, container_client: ContainerClient, data_list: List[Dict[str, Any]], target_blob_path: str
     ) -> None:
-        jsonl_string = "\n".join(json.dumps(record) for record in data_list)
-        jsonl_bytes = jsonl_string.encode("utf-8")
-        await container_client.upload_blob(name=target_blob_path, data=jsonl_bytes, overwrite=True)
+        jsonl_buffer = io.BytesIO()
+        for index, record in enumerate(data_list):
+            if index > 0:
+                jsonl_buffer.write(b"\n")
+            jsonl_buffer.write(orjson.dumps(record))
+        jsonl_buffer.seek(0)
+        await container_client.upload_blob(name=target_blob_path, data=jsonl_buffer, overwrite=True)
         self._logger.info(f"Uploaded jsonl to blob '{target_blob_path}'")
 
     async def generate_training_data_on_blob(
@@ -502,11 +886,11 @@ class AzureContentUnderstandingClient:
         """
         analyze_list: List[ReferenceDocItem] = []
 
-        for dirpath, _, filenames in os.walk(reference_docs_folder):
-            for filename in filenames:
-                _, file_ext = os.path.splitext(filename)
-                if self.is_supported_doc_type_by_file_ext(file_ext, is_document=True):
-                    file_path = os.path.join(dirpath, filename)
+        for _, file_entries in self._walk_files(reference_docs_folder):
+            for entry in file_entries:
+                filename = entry.name
+                if self._is_supported_ext(self._get_file_ext_lower(filename), is_document=True):
+                    file_path = entry.path
                     result_file_name = filename + self.OCR_RESULT_FILE_SUFFIX
                     analyze_list.append(
                         ReferenceDocItem(
@@ -532,14 +916,15 @@ class AzureContentUnderstandingClient:
         """
         upload_only_list: List[ReferenceDocItem] = []
 
-        for dirpath, _, filenames in os.walk(reference_docs_folder):
-            for filename in filenames:
-                _, file_ext = os.path.splitext(filename)
-                if self.is_supported_doc_type_by_file_ext(file_ext, is_document=True):
-                    file_path = os.path.join(dirpath, filename)
+        for dirpath, file_entries in self._walk_files(reference_docs_folder):
+            filenames = {entry.name for entry in file_entries}
+            for entry in file_entries:
+                filename = entry.name
+                if self._is_supported_ext(self._get_file_ext_lower(filename), is_document=True):
+                    file_path = entry.path
                     result_file_name = filename + self.OCR_RESULT_FILE_SUFFIX
                     result_file_path = os.path.join(dirpath, result_file_name)
-                    if not os.path.exists(result_file_path):
+                    if result_file_name not in filenames:
                         raise FileNotFoundError(
                             f"Result file '{result_file_name}' does not exist in '{dirpath}'. "
                             f"Please run analyze first or remove this file from the folder."
@@ -556,8 +941,7 @@ class AzureContentUnderstandingClient:
                     original_filename = filename.replace(self.OCR_RESULT_FILE_SUFFIX, "")
                     if original_filename in filenames:
                         # skip result.json files corresponding to the file with supported document type
-                        _, original_file_ext = os.path.splitext(original_filename)
-                        if self.is_supported_doc_type_by_file_ext(original_file_ext, is_document=True):
+                        if self._is_supported_ext(self._get_file_ext_lower(original_filename), is_document=True):
                             continue
                         else:
                             raise ValueError(
@@ -577,12 +961,28 @@ class AzureContentUnderstandingClient:
 
         return upload_only_list
 
+    @staticmethod
+    async def _gather_or_cancel(*aws: Awaitable[Any]) -> List[Any]:
+        """
+        Runs the awaitables concurrently like asyncio.gather, but if any of them fails (or the gather is cancelled),
+        cancels the others and waits for them before re-raising, so that none keeps running against closed clients.
+        """
+        tasks = [asyncio.ensure_future(aw) for aw in aws]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
     async def generate_knowledge_base_on_blob(
         self,
         reference_docs_folder: str,
         storage_container_sas_url: str,
         storage_container_path_prefix: str,
         skip_analyze: bool = False,
+        max_concurrency: int = MAX_CONCURRENT_ANALYZE,
     ) -> None:
         """
         Generates a knowledge base on Azure Blob Storage by analyzing or uploading files from the given folder.
@@ -591,38 +991,74 @@ class AzureContentUnderstandingClient:
             storage_container_sas_url (str): The SAS URL of the Azure Blob Storage container.
             storage_container_path_prefix (str): The path prefix within the storage container where files will be
             skip_analyze (bool): If True, skips the analysis step and only uploads existing result files.
+            max_concurrency (int): The maximum number of files analyzed at the same time.
         """
         if not storage_container_path_prefix.endswith("/"):
             storage_container_path_prefix += "/"
         
-        resources = []
         async with ContainerClient.from_container_url(storage_container_sas_url) as container_client:
+            upload_semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOAD)
+
+            async def upload_limited(upload: Callable[..., Awaitable[None]], *args: Any) -> None:
+                # the upload coroutine is only created once the semaphore is acquired, so that a wrapper
+                # cancelled while waiting for its turn never leaves a coroutine behind that was never awaited
+                async with upload_semaphore:
+                    await upload(*args)
+
+            async def upload_item_files(item: ReferenceDocItem) -> Dict[str, str]:
+                result_file_blob_path = storage_container_path_prefix + item.result_file_name
+                file_blob_path = storage_container_path_prefix + item.filename
+                await self._gather_or_cancel(
+                    upload_limited(self._upload_file_to_blob, container_client, item.result_file_path, result_file_blob_path),
+                    upload_limited(self._upload_file_to_blob, container_client, item.file_path, file_blob_path),
+                )
+                return {"file": item.filename, "resultFile": item.result_file_name}
+
             if not skip_analyze:
                 analyze_list = self._get_analyze_list(reference_docs_folder)
-                for analyze_item in analyze_list:
-                    self._logger.info(f"Analyzing result for {analyze_item.filename}")
-                    try:
-                        analyze_result = self.get_prebuilt_document_analyze_result(analyze_item.file_path)
-                    except Exception as e:
-                        self._logger.error(
-                            f"Error of getting analyze result of '{analyze_item.filename}'. "
-                            f"Please check the error message and consider retrying or removing this file."
-                            )
-                        raise e
+                analyze_semaphore = asyncio.Semaphore(max_concurrency)
+
+                async def analyze_and_upload(
+                    session: aiohttp.ClientSession, analyze_item: ReferenceDocItem
+                ) -> Dict[str, str]:
                     result_file_blob_path = storage_container_path_prefix + analyze_item.result_file_name
                     file_blob_path = storage_container_path_prefix + analyze_item.filename
-                    await self._upload_json_to_blob(container_client, analyze_result, result_file_blob_path)
-                    await self._upload_file_to_blob(container_client, analyze_item.file_path, file_blob_path)
-                    resources.append({"file": analyze_item.filename, "resultFile": analyze_item.result_file_name})
+                    # The original file does not depend on the analyze result, so upload it while the service analyzes
+                    upload_file_task = asyncio.create_task(
+                        upload_limited(self._upload_file_to_blob, container_client, analyze_item.file_path, file_blob_path)
+                    )
+                    try:
+                        async with analyze_semaphore:
+                            self._logger.info(f"Analyzing result for {analyze_item.filename}")
+                            try:
+                                analyze_result = await self._analyze_cached(session, analyze_item.file_path)
+                            except Exception as e:
+                                self._logger.error(
+                                    f"Error of getting analyze result of '{analyze_item.filename}'. "
+                                    f"Please check the error message and consider retrying or removing this file."
+                                    )
+                                raise e
+                        await upload_limited(self._upload_json_to_blob, container_client, analyze_result, result_file_blob_path)
+                        await upload_file_task
+                    finally:
+                        # on any failure or cancellation, the upload must not outlive the container client
+                        if not upload_file_task.done():
+                            upload_file_task.cancel()
+                            await asyncio.gather(upload_file_task, return_exceptions=True)
+                    return {"file": analyze_item.filename, "resultFile": analyze_item.result_file_name}
+
+                connector = aiohttp.TCPConnector(limit=max_concurrency, keepalive_timeout=75)
+                async with aiohttp.ClientSession(connector=connector) as session:
+                    resources = await self._gather_or_cancel(
+                        *(analyze_and_upload(session, analyze_item) for analyze_item in analyze_list)
+                    )
             else:
                 upload_list = self._get_upload_only_list(reference_docs_folder)
                 for upload_item in upload_list:
                     self._logger.info(f"Using existing result.json for '{upload_item.filename}'")
-                    result_file_blob_path = storage_container_path_prefix + upload_item.result_file_name
-                    file_blob_path = storage_container_path_prefix + upload_item.filename
-                    await self._upload_file_to_blob(container_client, upload_item.file_path, file_blob_path)
-                    await self._upload_file_to_blob(container_client, upload_item.result_file_path, result_file_blob_path)
-                    resources.append({"file": upload_item.filename, "resultFile": upload_item.result_file_name})
+                resources = await self._gather_or_cancel(
+                    *(upload_item_files(upload_item) for upload_item in upload_list)
+                )
 
             # Upload sources.jsonl
             await self.upload_jsonl_to_blob(
@@ -645,10 +1081,10 @@ class AzureContentUnderstandingClient:
             )
         operation_location = operation_location.split("?api-version")[0]
         image_retrieval_url = (
-            f"{operation_location}/files/{image_id}?api-version={self._api_version}"
+            f"{operation_location}/files/{image_id}{self._api_version_qs}"
         )
         try:
-            response = requests.get(url=image_retrieval_url, headers=self._headers)
+            response = self._session.get(url=image_retrieval_url)
             response.raise_for_status()
 
             assert response.headers.get("Content-Type") == "image/jpeg"
@@ -684,12 +1120,11 @@ class AzureContentUnderstandingClient:
             raise ValueError("Classifier ID must be provided.")
 
         headers = {"Content-Type": "application/json"}
-        headers.update(self._headers)
 
-        response = requests.put(
-            url=self._get_classifier_url(self._endpoint, self._api_version, classifier_id),
+        response = self._session.put(
+            url=self._get_classifier_url(classifier_id),
             headers=headers,
-            json=classifier_schema,
+            data=orjson.dumps(classifier_schema),
         )
         response.raise_for_status()
         self._logger.info(f"Classifier {classifier_id} create request accepted.")
@@ -713,7 +1148,11 @@ class AzureContentUnderstandingClient:
         data = None
         if Path(file_location).exists():
             with open(file_location, "rb") as file:
-                data = file.read()
+                if os.fstat(file.fileno()).st_size >= MMAP_MIN_FILE_SIZE:
+                    # Send large files straight from the page cache instead of copying them into memory
+                    data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    data = file.read()
             headers = {"Content-Type": "application/octet-stream"}
         elif "https://" in file_location or "http://" in file_location:
             data = {"url": file_location}
@@ -721,23 +1160,22 @@ class AzureContentUnderstandingClient:
         else:
             raise ValueError("File location must be a valid path or URL.")
 
-        headers.update(self._headers)
         if isinstance(data, dict):
-            response = requests.post(
-                url=self._get_classify_url(
-                    self._endpoint, self._api_version, classifier_id
-                ),
+            response = self._session.post(
+                url=self._get_classify_url(classifier_id),
                 headers=headers,
-                json=data,
+                data=orjson.dumps(data),
             )
         else:
-            response = requests.post(
-                url=self._get_classify_url(
-                    self._endpoint, self._api_version, classifier_id
-                ),
-                headers=headers,
-                data=data,
-            )
+            try:
+                response = self._session.post(
+                    url=self._get_classify_url(classifier_id),
+                    headers=headers,
+                    data=data,
+                )
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
 
         response.raise_for_status()
         self._logger.info(
@@ -749,15 +1187,20 @@ class AzureContentUnderstandingClient:
         self,
         response: Response,
         timeout_seconds: int = POLL_TIMEOUT_SECONDS,
-        polling_interval_seconds: int = 2,
+        polling_interval_seconds: float = POLL_INITIAL_INTERVAL_SECONDS,
+        max_polling_interval_seconds: float = POLL_MAX_INTERVAL_SECONDS,
     ) -> Dict[str, Any]:
         """
         Polls the result of an asynchronous operation until it completes or times out.
+        The wait between polling attempts doubles after every attempt, unless the service
+        returns a `Retry-After` header.
 
         Args:
             response (Response): The initial response object containing the operation location.
             timeout_seconds (int, optional): The maximum number of seconds to wait for the operation to complete. Defaults to 120.
-            polling_interval_seconds (int, optional): The number of seconds to wait between polling attempts. Defaults to 2.
+            polling_interval_seconds (float, optional): The number of seconds to wait before the second polling attempt,
+                doubled after every attempt. Defaults to 0.25.
+            max_polling_interval_seconds (float, optional): The maximum number of seconds to wait between polling attempts. Defaults to 10.
 
         Raises:
             ValueError: If the operation location is not found in the response headers.
@@ -771,10 +1214,9 @@ class AzureContentUnderstandingClient:
         if not operation_location:
             raise ValueError("Operation location not found in response headers.")
 
-        headers = {"Content-Type": "application/json"}
-        headers.update(self._headers)
-
+        operation_id = operation_location.split("/")[-1].split("?")[0]
         start_time = time.time()
+        attempt = 0
         while True:
             elapsed_time = time.time() - start_time
             if elapsed_time > timeout_seconds:
@@ -782,19 +1224,23 @@ class AzureContentUnderstandingClient:
                     f"Operation timed out after {timeout_seconds:.2f} seconds."
                 )
 
-            response = requests.get(operation_location, headers=self._headers)
+            response = self._session.get(operation_location)
             response.raise_for_status()
-            status = response.json().get("status").lower()
+            result = orjson.loads(response.content)
+            status = result.get("status", "").lower()
             if status == "succeeded":
                 self._logger.info(
                     f"Request result is ready after {elapsed_time:.2f} seconds."
                 )
-                return response.json()
+                return result
             elif status == "failed":
-                self._logger.error(f"Request failed. Reason: {response.json()}")
+                self._logger.error(f"Request failed. Reason: {result}")
                 raise RuntimeError("Request failed.")
             else:
                 self._logger.info(
-                    f"Request {operation_location.split('/')[-1].split('?')[0]} in progress ..."
+                    f"Request {operation_id} in progress ..."
                 )
-            time.sleep(polling_interval_seconds)
+            time.sleep(self._get_polling_interval(
+                attempt, response.headers, polling_interval_seconds, max_polling_interval_seconds
+            ))
+            attempt += 1
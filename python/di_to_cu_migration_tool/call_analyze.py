@@ -6,19 +6,33 @@ import json
 import os
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import typer
+from urllib3.util.retry import Retry
 
 # imports from external packages (in requirements.txt)
 from rich import print  # For colored output
 
+# imports from same project
+from get_ocr import get_polling_interval, get_token
+
 app = typer.Typer()
 
+# Shared session so that the analyze request and all polling requests reuse the same connection
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), respect_retry_after_header=True, raise_on_status=False),
+))
+
 @app.command()
 def main(
         analyzer_id: str = typer.Option(..., "--analyzer-id", help="Analyzer ID to use for the analyze API"),
         pdf_sas_url: str = typer.Option(..., "--pdf-sas-url", help="SAS URL for the PDF file to analyze"),
-        output_json: str = typer.Option("./sample_documents/analyzer_result.json", "--output-json", help="Output JSON file for the analyze result")
+        output_json: str = typer.Option("./sample_documents/analyzer_result.json", "--output-json", help="Output JSON file for the analyze result"),
+        verbose: bool = typer.Option(False, "--verbose", help="Print a progress dot for every polling attempt")
 ):
     """
     Main function to call the analyze API
@@ -30,10 +44,10 @@ def main(
     # Request Header - Content-Type
     # Acquire a token for the desired scope
     credential = DefaultAzureCredential()
-    token = credential.get_token("https://cognitiveservices.azure.com/.default")
+    current_token = get_token(credential)
 
     # Extract the access token
-    access_token = token.token
+    access_token = current_token.token
     subscription_key = os.getenv("SUBSCRIPTION_KEY")
     headers = {
         "Authorization": f"Bearer {access_token}",
@@ -47,7 +61,7 @@ def main(
 
     blob = BlobClient.from_blob_url(pdf_sas_url)
     blob_data = blob.download_blob().readall()
-    response = requests.post(url=endpoint, data=blob_data, headers=headers)
+    response = SESSION.post(url=endpoint, data=blob_data, headers=headers)
 
     response.raise_for_status()
     print(f"[yellow]Analyzing file {pdf_sas_url} with analyzer {analyzer_id}[/yellow]")
@@ -56,8 +70,12 @@ def main(
     if not operation_location:
         print("Error: 'Operation-Location' header is missing.")
 
+    attempt = 0
     while True:
-        poll_response = requests.get(operation_location, headers=headers)
+        # Refresh the token only if it is about to expire during a long-running analyze operation
+        current_token = get_token(credential, current_token)
+        headers["Authorization"] = f"Bearer {current_token.token}"
+        poll_response = SESSION.get(operation_location, headers=headers)
         poll_response.raise_for_status()
 
         result = poll_response.json()
@@ -74,8 +92,10 @@ def main(
             print(f"[red]Failed: {result}[/red]")
             break
         else:
-            print(".", end="", flush=True)
-            time.sleep(0.5)
+            if verbose:
+                print(".", end="", flush=True)
+            time.sleep(get_polling_interval(attempt, poll_response.headers))
+            attempt += 1
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
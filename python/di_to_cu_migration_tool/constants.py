@@ -1,3 +1,13 @@
+# imports from built-in packages
+from datetime import datetime
+from typing import Optional
+
+# imports from external packages (in requirements.txt)
+try:
+    from ciso8601 import parse_datetime as _parse_iso_datetime  # C parser, much faster than strptime
+except ImportError:
+    _parse_iso_datetime = datetime.fromisoformat
+
 # Supported DI versions
 DI_VERSIONS = ["generative", "neural"]
 CU_API_VERSION = "2025-05-01-preview"
@@ -6,6 +16,26 @@ CU_API_VERSION = "2025-05-01-preview"
 MAX_FIELD_COUNT = 100
 MAX_FIELD_LENGTH = 64
 
+# config of the converted analyzers, shared by all of the analyzer.json files as it is never modified
+ANALYZER_CONFIG = {
+    "returnDetails": True,
+    # Add the following line as a temp workaround before service issue is fixed.
+    "enableLayout": True,
+    "enableBarcode": False,
+    "enableFormula": False,
+    "estimateFieldSourceAndConfidence": True
+}
+
+# number of blobs downloaded from or uploaded to blob storage at the same time
+MAX_BLOB_TRANSFER_WORKERS = 16
+
+# maximum number of files that CU Layout is run on at the same time, to stay within the rate limits of the service
+MAX_OCR_CONCURRENCY = 40
+
+# polling interval grows exponentially from the initial value up to the max value
+POLL_INITIAL_INTERVAL_SECONDS = 0.25
+POLL_MAX_INTERVAL_SECONDS = 10
+
 # standard file names
 FIELDS_JSON = "fields.json"
 LABELS_JSON = ".labels.json"
@@ -64,3 +94,22 @@ VALID_CU_FIELD_TYPES = {
 DATE_FORMATS_SLASHED = ["%d/%m/%y", "%m/%d/%y", "%y/%m/%d","%d/%m/%Y", "%m/%d/%Y", "%Y/%m/%d"] # %Y is for 4-year format (Ex: 2015) and %y is for 2-year format (Ex: 15)
 DATE_FORMATS_DASHED = ["%d-%m-%y", "%m-%d-%y", "%y-%m-%d","%d-%m-%Y", "%m-%d-%Y", "%Y-%m-%d"] # can have dashes, instead of slashes
 COMPLETE_DATE_FORMATS = DATE_FORMATS_SLASHED + DATE_FORMATS_DASHED # combine the two formats
+
+def try_parse_date(date_string: str) -> Optional[datetime]:
+    """
+    Parse the date string with the ISO 8601 fast path first, then with the COMPLETE_DATE_FORMATS in order
+    Args:
+        date_string (str): The date string to parse
+    Returns:
+        Optional[datetime]: The parsed date, or None if no format matches
+    """
+    try:
+        return _parse_iso_datetime(date_string)
+    except (TypeError, ValueError):
+        pass
+    for fmt in COMPLETE_DATE_FORMATS:
+        try:
+            return datetime.strptime(date_string, fmt)
+        except ValueError:
+            continue
+    return None
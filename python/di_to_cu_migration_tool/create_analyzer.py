@@ -5,14 +5,26 @@ from dotenv import load_dotenv
 import json
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import typer
 
 # imports from external packages (in requirements.txt)
 from rich import print  # For colored output
+try:
+    import orjson  # parses the downloaded bytes directly, without decoding them to a str first
+except ImportError:
+    orjson = None
+
+# imports from same project
+from get_ocr import get_polling_interval
 
 app = typer.Typer()
 
+# Shared session so that the blob download, the create request and all polling requests reuse the same connections
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+
 @app.command()
 def main(
     analyzer_sas_url: str = typer.Option("", "--analyzer-sas-url", help="SAS URL for the created analyzer.json"),
@@ -29,10 +41,9 @@ def main(
 
     # Load the analyzer.json file
     print(f"Loading analyzer.json from...")
-    blob_client = BlobClient.from_blob_url(analyzer_sas_url)
-    analyzer_json = blob_client.download_blob().readall()
-    analyzer_json = analyzer_json.decode("utf-8")
-    analyzer_json = json.loads(analyzer_json)
+    blob_client = BlobClient.from_blob_url(analyzer_sas_url, session=SESSION)
+    analyzer_bytes = b"".join(blob_client.download_blob().chunks())
+    analyzer_json = orjson.loads(analyzer_bytes) if orjson else json.loads(analyzer_bytes)
     print("[yellow]Finished loading analyzer.json.[/yellow]\n")
 
     # URI Parameters - analyzerId, endpoint, & api-version
@@ -58,7 +69,7 @@ def main(
 
 
     print(f"[yellow]Creating analyzer with analyzer ID: {analyzer_id}...[/yellow]")
-    response = requests.put(
+    response = SESSION.put(
         url=endpoint,
         headers=headers,
         json=analyzer_json,
@@ -68,8 +79,9 @@ def main(
     if not operation_location:
         print("Error: 'Operation-Location' header is missing.")
 
+    attempt = 0
     while True:
-        poll_response = requests.get(operation_location, headers=headers)
+        poll_response = SESSION.get(operation_location, headers=headers)
         poll_response.raise_for_status()
 
         result = poll_response.json()
@@ -83,7 +95,8 @@ def main(
             break
         else:
             print(".", end="", flush=True)
-            time.sleep(0.5)
+            time.sleep(get_polling_interval(attempt, poll_response.headers))
+            attempt += 1
 
 if __name__ == "__main__":
     app()
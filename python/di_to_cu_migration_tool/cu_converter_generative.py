@@ -1,7 +1,10 @@
 # imports from built-in packages
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
 from dateutil.parser import parse
 from datetime import datetime
-import json
+from functools import lru_cache
+import os
 from pathlib import Path
 import re
 import sys
@@ -12,8 +15,9 @@ from typing import Optional, Tuple
 from rich import print  # For colored output
 
 # imports from same project
-from constants import CU_API_VERSION, MAX_FIELD_LENGTH, VALID_CU_FIELD_TYPES
+from constants import ANALYZER_CONFIG, CU_API_VERSION, MAX_FIELD_LENGTH, VALID_CU_FIELD_TYPES
 from field_definitions import FieldDefinitions
+from json_io import read_json, write_json
 
 # schema constants subject to change
 ANALYZER_FIELDS = "fieldSchema"
@@ -21,6 +25,17 @@ ANALYZER_FIELDS = "fieldSchema"
 # Remember that dynamic tables are arrays and fixed tables are objects
 ANALYZER_DESCRIPTION = "1. Define your schema by specifying the fields you want to extract from the input files. Choose clear and simple `field names`. Use `field descriptions` to provide explanations, exceptions, rules of thumb, and other details to clarify the desired behavior.\n\n2. For each field, indicate the `value type` of the desired output. Besides basic types like strings, dates, and numbers, you can define more complex structures such as `tables` (repeated items with subfields) and `fixed tables` (groups of fields with common subfields)."
 CU_LABEL_SCHEMA = f"https://schema.ai.azure.com/mmi/{CU_API_VERSION}/labels.json"
+# label dates are tried as numeric mm/dd/yyyy first, then with these formats, and only then with dateutil
+LABEL_DATE_FORMATS = ["%B %d,%Y", "%B %d, %Y"]
+MDY_DATE_PATTERN = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+# minimum number of pages in an ocr.json before its pages are converted in worker processes
+PARALLEL_OCR_MIN_PAGES = 32
+# number and integer label contents matching these are converted directly, the rest are stripped first
+NUMBER_PATTERN = re.compile(r'\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*')
+INTEGER_PATTERN = re.compile(r'\s*[-+]?\d+\s*')
+# used to strip number and integer label contents that cannot be converted directly
+NON_NUMERIC_PATTERN = re.compile(r'[^0-9.]')
+NON_DIGIT_PATTERN = re.compile(r'[^0-9]')
 
 def convert_bounding_regions_to_source(page_number: int, polygon: list) -> str:
     """
@@ -32,10 +47,98 @@ def convert_bounding_regions_to_source(page_number: int, polygon: list) -> str:
         str: The source string in the format D(page_number, x1,y1,x2,y2,...).
     """
     # Convert polygon to string format
-    polygon_str = ",".join(str(coord) for coord in polygon)
-    source = f"D({page_number},{polygon_str})"
-    return source
+    polygon_str = ",".join(map(str, polygon))
+    return f"D({page_number},{polygon_str})"
 
+def merge_line_spans(spans: list) -> dict:
+    """
+    Merge the spans of a DI line into the single span of a CU line.
+    Args:
+        spans (list): The spans of the line.
+    Returns:
+        dict: The span covering all the given spans.
+    """
+    if len(spans) == 1:
+        return spans[0]
+    # If mulitple spans, offset becomes the lowest offset
+    # and length becomes max offset + length of max offset - min offset
+    min_offset = max_offset = spans[0]["offset"]
+    max_length = spans[0]["length"]
+    for span in spans[1:]:
+        offset = span["offset"]
+        if offset < min_offset:
+            min_offset = offset
+        elif offset > max_offset: # strictly greater, so the first span with the max offset is kept
+            max_offset = offset
+            max_length = span["length"]
+    return {
+        "offset": min_offset,
+        "length": max_offset + max_length - min_offset
+    }
+
+def normalize_label_date(date_string: str) -> str:
+    """
+    Normalize the content of a date label to the CU date format, trying the cheap formats before dateutil.
+    Args:
+        date_string (str): The content of the date label.
+    Returns:
+        str: The date in "%Y-%m-%d" format, or the original content if it could not be parsed.
+    """
+    if not isinstance(date_string, str):
+        return date_string
+    match = MDY_DATE_PATTERN.match(date_string)
+    if match:
+        with suppress(ValueError):
+            return datetime(int(match[3]), int(match[1]), int(match[2])).strftime("%Y-%m-%d")
+    for fmt in LABEL_DATE_FORMATS:
+        with suppress(ValueError):
+            return datetime.strptime(date_string, fmt).strftime("%Y-%m-%d")
+    try:
+        return parse(date_string).date().strftime("%Y-%m-%d")
+    except (ValueError, OverflowError):
+        return date_string # going with the default
+
+def convert_label_number(content: str) -> float:
+    """
+    Convert the content of a number label to a float, stripping non-numerical characters if needed.
+    Args:
+        content (str): The content of the number label.
+    Returns:
+        float: The number value.
+    """
+    if NUMBER_PATTERN.fullmatch(content):
+        return float(content)  # content can be easily converted to a float
+    # strip the string of all non-numerical values and periods
+    cleaned_string = NON_NUMERIC_PATTERN.sub('', content)
+    cleaned_string = cleaned_string.strip('.')  # Remove any leading or trailing periods
+    # if more than one period exists, remove them all
+    if cleaned_string.count('.') > 1:
+        print("More than one decimal point exists, so will be removing them all.")
+        cleaned_string = cleaned_string.replace('.', '')
+    return float(cleaned_string)
+
+def convert_label_integer(content: str) -> int:
+    """
+    Convert the content of an integer label to an int, stripping non-numerical characters if needed.
+    Args:
+        content (str): The content of the integer label.
+    Returns:
+        int: The integer value.
+    """
+    if INTEGER_PATTERN.fullmatch(content):
+        return int(content)  # content can be easily converted to an int
+    # strip the string of all non-numerical values
+    cleaned_string = NON_DIGIT_PATTERN.sub('', content)
+    return int(cleaned_string)
+
+# label types whose content needs converting when the label has no value, all other types use the content as is
+LABEL_CONTENT_CONVERTERS = {
+    "date": normalize_label_date,
+    "number": convert_label_number,
+    "integer": convert_label_integer,
+}
+
+@lru_cache(maxsize=1024) # pages of the same document usually share a few angle values
 def format_angle(angle: float) -> float:
    """
    Format the angle to 7 decimal places and remove trailing zeros.
@@ -48,7 +151,7 @@ def format_angle(angle: float) -> float:
    formatted_num = f"{rounded_angle:.7f}".rstrip('0')  # Remove trailing zeros
    return float(formatted_num)
 
-def convert_fields_to_analyzer(fields_json_path: Path, analyzer_prefix: Optional[str], target_dir: Path, field_definitions: FieldDefinitions) -> dict:
+def convert_fields_to_analyzer(fields_json_path: Path, analyzer_prefix: Optional[str], target_dir: Path, field_definitions: FieldDefinitions, pretty: bool = False) -> dict:
     """
     Convert DI 4.0 preview Custom Document fields.json to analyzer.json format.
     Args:
@@ -56,18 +159,11 @@ def convert_fields_to_analyzer(fields_json_path: Path, analyzer_prefix: Optional
         analyzer_prefix (Optional(str)): Prefix for the analyzer name.
         target_dir (Optional[Path]): Output directory for the analyzer.json file.
         field_definitions (FieldDefinitions): Field definitions object to store definitions in case of fixed tables.
+        pretty (bool): Whether to indent the analyzer.json file.
     Returns:
         dict: The generated analyzer.json data.
     """
-    try:
-        with open(fields_json_path, 'r') as f:
-            fields_data = json.load(f)
-    except FileNotFoundError:
-        print(f"[red]Error: fields.json file not found at {fields_json_path}.[/red]")
-        sys.exit(1)
-    except json.JSONDecodeError:
-        print("[red]Error: Invalid JSON in fields.json.[/red]")
-        sys.exit(1)
+    fields_data = read_json(fields_json_path, "fields.json")
 
     doc_type = fields_data.get('docType')
 
@@ -80,14 +176,7 @@ def convert_fields_to_analyzer(fields_json_path: Path, analyzer_prefix: Optional
     analyzer_data = {
         "analyzerId": analyzer_id,
         "baseAnalyzerId": "prebuilt-documentAnalyzer",
-        "config": {
-            "returnDetails": True,
-            # Add the following line as a temp workaround before service issue is fixed.
-            "enableLayout": True,
-            "enableBarcode": False,
-            "enableFormula": False,
-            "estimateFieldSourceAndConfidence": True
-        },
+        "config": ANALYZER_CONFIG,
         ANALYZER_FIELDS: {
             "name": doc_type,
             "description": ANALYZER_DESCRIPTION,
@@ -125,15 +214,15 @@ def convert_fields_to_analyzer(fields_json_path: Path, analyzer_prefix: Optional
     analyzer_json_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Write analyzer.json
-    with open(analyzer_json_path, 'w') as f:
-        json.dump(analyzer_data, f, indent=4)
+    write_json(analyzer_json_path, analyzer_data, pretty)
 
     print(f"[green]Successfully converted {fields_json_path} to analyzer.json at {analyzer_json_path}[/green]\n")
     return analyzer_data
 
 def recursive_convert_field_to_analyzer_helper(key: str, value: dict, field_definitions: FieldDefinitions) -> dict:
     """
-    Recursively convert each DI field to CU analyzer.json format
+    Convert each DI field and its nested fields to CU analyzer.json format
+    Nested fields are converted with an explicit stack, in the same order as a recursive traversal, so deeply nested schemas do not hit the recursion limit.
     Args:
         key (str): The field key.
         value (dict): The field value.
@@ -141,72 +230,84 @@ def recursive_convert_field_to_analyzer_helper(key: str, value: dict, field_defi
     Returns:
         dict: The converted field in analyzer.json format.
     """
+    root = {}
+    stack = [(key, value, root, key)]
+    while stack:
+        field_key, field_value, parent, parent_key = stack.pop()
+        analyzer_field, nested_fields = _convert_field_to_analyzer(field_key, field_value, field_definitions)
+        parent[parent_key] = analyzer_field
+        stack.extend(reversed(nested_fields))
+    return root[key]
+
+def _convert_field_to_analyzer(key: str, value: dict, field_definitions: FieldDefinitions) -> Tuple[dict, list]:
+    """
+    Helper function to convert a single DI field to CU analyzer.json format, without its nested fields
+    Args:
+        key (str): The field key.
+        value (dict): The field value.
+        field_definitions (FieldDefinitions): Field definitions object that stores definitions in case of fixed tables.
+    Returns:
+        Tuple[dict, list]: The converted field and its nested fields still to be converted, as (key, value, parent, parent key) tuples.
+    """
     # this is the method that does the conversion of the fields itself
+    nested_fields = []
+    field_type = value.get("type")
 
     analyzer_field = {
-        "type": value.get("type"),
+        "type": field_type,
         "method": "extract",
     }
 
-    if value.get("type") == "array":
+    if field_type == "array":
         analyzer_field["method"] = value.get("method", "generate")
         analyzer_field["description"] = value.get("description", "")
-        analyzer_field["items"] = recursive_convert_field_to_analyzer_helper(key, value.get("items"), field_definitions)
-    elif value.get("type") == "object":
+        nested_fields.append((key, value.get("items"), analyzer_field, "items"))
+    elif field_type == "object":
         # if the properties are objects, this is a fixed sized table
         # if the properties are not objects, this is a dynamic sized table
+        properties = value.get("properties")
         fixed_table = False
-        first_value = next(iter(value.get("properties").values()))
+        first_row_key, first_value = next(iter(properties.items()))
         if(first_value.get("type") == "object"):
             fixed_table = True
             analyzer_field["description"] = value.get("description", "")
-        analyzer_field["properties"] = {}
+        analyzer_properties = analyzer_field["properties"] = {}
 
         if not fixed_table:
-            for i, (key, item) in enumerate(value.get("properties").items()):
-                analyzer_field["properties"][key] = recursive_convert_field_to_analyzer_helper(key, item, field_definitions)
+            for property_key, item in properties.items():
+                nested_fields.append((property_key, item, analyzer_properties, property_key))
         else:
             analyzer_field["method"] = value.get("method", "generate")
-            first_row_key = "" # only need to use the first row for creating a definition, since the rest will be the same as it is a fixed table
-            for i, (row_key, row_item) in enumerate(value.get("properties").items()):
-                if i == 0:
-                    first_row_key = row_key
-                    definitions_key = f"{key}_{row_key}"
-                    if len(definitions_key) > MAX_FIELD_LENGTH:
-                        print(f"[red]Error: The fixed table definition '{definitions_key}' will contain {len(definitions_key)}, which exceeds the limit of {MAX_FIELD_LENGTH} characters. Please shorten either the table name or row name. [/red]")
-                        sys.exit(1)
-                    # need to add methods to all the columns
-                    for property_key, property_data in row_item["properties"].items():
-                        if property_data.get("method") is None:
-                            property_data["method"] = "extract"
-                        if property_data.get("description") is None:
-                            property_data["description"] = ""
-                    definitions_value = row_item
-                    field_definitions.add_definition(definitions_key, definitions_value)
-                analyzer_field["properties"][row_key] = {}
-                analyzer_field["properties"][row_key]["$ref"] = f"#/$defs/{key}_{first_row_key}"
+            # only need to use the first row for creating a definition, since the rest will be the same as it is a fixed table
+            definitions_key = f"{key}_{first_row_key}"
+            if len(definitions_key) > MAX_FIELD_LENGTH:
+                print(f"[red]Error: The fixed table definition '{definitions_key}' will contain {len(definitions_key)}, which exceeds the limit of {MAX_FIELD_LENGTH} characters. Please shorten either the table name or row name. [/red]")
+                sys.exit(1)
+            # need to add methods to all the columns
+            for property_key, property_data in first_value["properties"].items():
+                if property_data.get("method") is None:
+                    property_data["method"] = "extract"
+                if property_data.get("description") is None:
+                    property_data["description"] = ""
+            field_definitions.add_definition(definitions_key, first_value)
+            definition_ref = f"#/$defs/{definitions_key}"
+            for row_key in properties:
+                analyzer_properties[row_key] = {"$ref": definition_ref}
 
     else:
         analyzer_field["description"] = value.get("description", "")
 
-    return analyzer_field
+    return analyzer_field, nested_fields
 
-def convert_di_labels_to_cu(di_labels_path: Path, target_dir: Path) -> None:
+def convert_di_labels_to_cu(di_labels_path: Path, target_dir: Path, pretty: bool = False) -> None:
     """
     Convert DI 4.0 preview Custom Document format labels.json to Content Understanding format labels.json.
     Args:
         di_labels_path (Path): Path to the Document Intelligence labels.json file.
         target_dir (Path): Output directory for the Content Understanding labels.json file.
+        pretty (bool): Whether to indent the labels.json file.
     """
-    try:
-        with open(di_labels_path, 'r', encoding="utf-8") as f:
-            di_data = json.load(f)
-    except FileNotFoundError:
-        print(f"[red]Error: Document Intelligence labels.json file not found at {di_labels_path}.[/red]")
-        sys.exit(1)
-    except json.JSONDecodeError:
-        print("[red]Error: Invalid JSON in Document Intelligence labels.json.[/red]")
-        sys.exit(1)
+    di_data = read_json(di_labels_path, "Document Intelligence labels.json")
 
     # Start building Content Understanding labels.json
     cu_data = {
@@ -229,22 +330,40 @@ def convert_di_labels_to_cu(di_labels_path: Path, target_dir: Path) -> None:
     target_dir.mkdir(parents=True, exist_ok=True)
     cu_labels_path = target_dir / di_labels_path.name
 
-    with open(cu_labels_path, 'w') as f:
-        json.dump(cu_data, f, indent=4, ensure_ascii=False)
+    write_json(cu_labels_path, cu_data, pretty)
 
     print(f"[green]Successfully converted Document Intelligence labels.json to Content Understanding labels.json at {cu_labels_path}[/green]\n")
 
 def recursive_convert_di_label_to_cu_helper(value: dict) -> dict:
     """
-    Recursively convert each DI field to CU labels.json format
+    Convert each DI field label and its nested labels to CU labels.json format
+    Nested labels are converted with an explicit stack, in the same order as a recursive traversal, so deeply nested labels do not hit the recursion limit.
     Args:
         value (dict): The field value.
     Returns:
         dict: The converted field in labels.json format.
     """
-    
+    root = {"": value}
+    stack = [(root, "")]
+    while stack:
+        parent, parent_key = stack.pop()
+        di_label, nested_labels = _convert_di_label_to_cu(parent[parent_key])
+        parent[parent_key] = di_label
+        stack.extend(reversed(nested_labels))
+    return root[""]
+
+def _convert_di_label_to_cu(value: dict) -> Tuple[dict, list]:
+    """
+    Helper function to convert a single DI field label to CU labels.json format, without its nested labels
+    Args:
+        value (dict): The field value.
+    Returns:
+        Tuple[dict, list]: The converted field and its nested labels still to be converted, as (parent, parent key) tuples.
+    """
+    nested_labels = []
+
     value_type = value.get("type")
-    if(value_type not in VALID_CU_FIELD_TYPES and value_type != "selectionMark"):
+    if(value_type not in VALID_CU_FIELD_TYPES): # also includes the DI only "selectionMark" type
         print(f"[red]Unexpected field type: {value_type}. Please refer to the specification for valid field types.[/red]")
         sys.exit(1)
 
@@ -256,58 +375,22 @@ def recursive_convert_di_label_to_cu_helper(value: dict) -> dict:
         value_array = value.get("valueArray")
         di_label["kind"] = value.get("kind", "confirmed")
         di_label["valueArray"] = value_array
-        for i, item in enumerate(value_array):
-            value_array[i] = recursive_convert_di_label_to_cu_helper(item)
+        for i in range(len(value_array)):
+            nested_labels.append((value_array, i))
     elif value_type == "object":
         value_object = value.get("valueObject")
         di_label["kind"] = value.get("kind", "confirmed")
         di_label["valueObject"] = value_object
-        for i, item in value_object.items():
-            value_object[i] = recursive_convert_di_label_to_cu_helper(item)
+        for i in value_object:
+            nested_labels.append((value_object, i))
     else:
         value_part = VALID_CU_FIELD_TYPES[value_type]
-        if value.get(value_part) is not None and value.get(value_part) != "":
-            di_label[value_part] = value.get(value_part)
-        else:
-            if value_type == "date":
-                date_string = value.get("content")
-                formats_to_try = ["%B %d,%Y", "parse", "%B %d, %Y", "%m/%d/%Y"]
-                finished_date_normalization = False # to keep track of whether we have finished normalizing the date, if not, date will be set to originalDate
-                for fmt in formats_to_try:
-                    try:
-                        if fmt == "parse":
-                            di_label["valueDate"] = parse(date_string).date().strftime("%Y-%m-%d")
-                        else:
-                            date_obj = datetime.strptime(date_string, fmt)
-                            di_label["valueDate"] = date_obj.strftime("%Y-%m-%d")
-                        finished_date_normalization = True
-                    except Exception as ex:
-                        continue
-                if not finished_date_normalization:
-                    di_label["valueDate"] = date_string # going with the default
-            elif value_type == "number":
-                try:
-                    di_label["valueNumber"] = float(value.get("content"))  # content can be easily converted to a float
-                except Exception as ex:
-                    # strip the string of all non-numerical values and periods
-                    string_value = value.get("content")
-                    cleaned_string = re.sub(r'[^0-9.]', '', string_value)
-                    cleaned_string = cleaned_string.strip('.')  # Remove any leading or trailing periods
-                    # if more than one period exists, remove them all
-                    if cleaned_string.count('.') > 1:
-                        print("More than one decimal point exists, so will be removing them all.")
-                        cleaned_string = cleaned_string = re.sub(r'\.', '', string_value)
-                    di_label["valueNumber"] = float(cleaned_string)
-            elif value_type == "integer":
-                try:
-                    di_label["valueInteger"] = int(value.get("content"))  # content can be easily converted to an int
-                except Exception as ex:
-                     # strip the string of all non-numerical values
-                    string_value = value.get("content")
-                    cleaned_string = re.sub(r'[^0-9]', '', string_value)
-                    di_label["valueInteger"] = int(cleaned_string)
-            else:
-                di_label[value_part] = value.get("content")
+        label_value = value.get(value_part)
+        if label_value is None or label_value == "":
+            # fall back to the content, converted to the value type if needed
+            content_converter = LABEL_CONTENT_CONVERTERS.get(value_type)
+            label_value = content_converter(value.get("content")) if content_converter else value.get("content")
+        di_label[value_part] = label_value
         di_label["spans"] = value.get("spans", [])
 
     if(value.get("kind", "confirmed") == "confirmed" and di_label["type"] != "array" and di_label["type"] != "object"):
@@ -332,24 +415,58 @@ def recursive_convert_di_label_to_cu_helper(value: dict) -> dict:
         di_label["kind"] = value.get("kind", "confirmed")
         di_label["metadata"] = value.get("metadata", {})
 
-    return di_label
+    return di_label, nested_labels
 
-def convert_ocr_to_result(di_ocr_path: Path, target_dir: Path) -> None:
+def convert_ocr_page(page: dict) -> dict:
+    """
+    Convert a Document Intelligence ocr.json page, with its words and lines, to Content Understanding result.json format
+    Args:
+        page (dict): The Document Intelligence page.
+    Returns:
+        dict: The Content Understanding page.
+    """
+    # local alias, since it is called for every word and line of the page
+    to_source = convert_bounding_regions_to_source
+    page_number = page["pageNumber"]
+    cu_page = {
+        "pageNumber": page_number,
+        "angle": format_angle(page["angle"]),
+        "width": page["width"],
+        "height": page["height"],
+        "spans": page["spans"],
+        "words": [],
+        "lines": []
+    }
+    if(page.get("selectionMarks") is not None):
+        cu_page["selectionMarks"] = page.get("selectionMarks")
+    cu_page["words"] = [
+        {
+            "content": word["content"],
+            "span": word["span"],
+            "confidence": word["confidence"],
+            "source": to_source(page_number, word["polygon"])
+        }
+        for word in page["words"]
+    ]
+    cu_page["lines"] = [
+        {
+            "content": line["content"],
+            "source": to_source(page_number, line["polygon"]),
+            "span": merge_line_spans(line["spans"])
+        }
+        for line in page["lines"]
+    ]
+    return cu_page
+
+def convert_ocr_to_result(di_ocr_path: Path, target_dir: Path, pretty: bool = False) -> None:
     """
     Convert Document Intelligence format ocr.json to Content Understanding format result.json
     Args:
         di_ocr_path (Path): Path to the Document Intelligence ocr.json file.
         target_dir (Path): Output directory for the Content Undrestanding result.json file.
+        pretty (bool): Whether to indent the result.json file.
     """
-    try:
-        with open(di_ocr_path, 'r', encoding="utf-8") as f:
-            ocr_data = json.load(f)
-    except FileNotFoundError:
-        print(f"[red]Error: Document Intelligence ocr.json file not found at {di_ocr_path}.[/red]")
-        sys.exit(1)
-    except json.JSONDecodeError:
-        print("[red]Error: Invalid JSON in Document Intelligence ocr.json.[/red]")
-        sys.exit(1)
+    ocr_data = read_json(di_ocr_path, "Document Intelligence ocr.json")
 
     # Start building Content Understanding results.json
     cu_results_data = {
@@ -374,76 +491,46 @@ def convert_ocr_to_result(di_ocr_path: Path, target_dir: Path) -> None:
     cu_results_data["result"]["contents"][0]["endPageNumber"] = di_results["pages"][-1]["pageNumber"]
     cu_results_data["result"]["contents"][0]["unit"] = di_results["pages"][0].get("unit", "inch")
 
+    # local alias, since it is called for every cell and region of the document
+    to_source = convert_bounding_regions_to_source
+
     # Configuring pages
     if (di_results.get("pages") is not None):
-        cu_results_data["result"]["contents"][0]["pages"] = []
-        for page in di_results["pages"]:
-            cu_page = {
-                "pageNumber": page["pageNumber"],
-                "angle": format_angle(page["angle"]),
-                "width": page["width"],
-                "height": page["height"],
-                "spans": page["spans"],
-                "words": [],
-                "lines": []
-            }
-            if(page.get("selectionMarks") is not None):
-                cu_page["selectionMarks"] = page.get("selectionMarks")
-            for word in page["words"]:
-                cu_word = {
-                    "content": word["content"],
-                    "span": word["span"],
-                    "confidence": word["confidence"],
-                    "source": convert_bounding_regions_to_source(page['pageNumber'], word['polygon']) # map str function to each element in polygon and then joins it all together with ,
-                }
-                cu_page["words"].append(cu_word)
-            for line in page["lines"]:
-                cu_line = {
-                    "content": line["content"],
-                    "source": convert_bounding_regions_to_source(page['pageNumber'], line['polygon']), # map str function to each element in polygon and then joins it all together with ,
-                }
-                if len(line["spans"]) == 1:
-                    cu_line["span"] = line["spans"][0]
-                else:
-                    # If mulitple spans, offset becomes the lowest offset
-                    # and length becomes max offset + length of max offset - min offset
-                    min_offset = min([span["offset"] for span in line["spans"]])
-                    max_offset = max([span["offset"] for span in line["spans"]])
-                    max_length = next(span for span in line["spans"] if span["offset"] == max_offset)["length"]
-                    cu_line["span"] = {
-                        "offset": min_offset,
-                        "length": max_offset + max_length - min_offset
-                    }
-                cu_page["lines"].append(cu_line)
-            cu_results_data["result"]["contents"][0]["pages"].append(cu_page)
+        pages = di_results["pages"]
+        # pages are independent, so large documents are converted in parallel when more than one CPU is available
+        # pages are pickled to and from the worker processes, which costs more than converting small documents
+        if len(pages) >= PARALLEL_OCR_MIN_PAGES and (os.cpu_count() or 1) > 1:
+            with ProcessPoolExecutor() as executor:
+                cu_pages = list(executor.map(convert_ocr_page, pages, chunksize=8))
+        else:
+            cu_pages = [convert_ocr_page(page) for page in pages]
+        cu_results_data["result"]["contents"][0]["pages"] = cu_pages
 
     # Configuring paragraphs
     if (di_results.get("paragraphs") is not None):
         cu_results_data["result"]["contents"][0]["paragraphs"] = []
         for paragraph in di_results["paragraphs"]:
-            cu_paragraph = {
-                "role": paragraph.get("role", ""),
-                "content": paragraph["content"],
-                "source": paragraph.get("boundingRegions", None),
-                "span": paragraph["spans"][0]
-            }
-            if (cu_paragraph["source"] is not None):
-                cu_paragraph["source"] = convert_bounding_regions_to_source(paragraph['boundingRegions'][0]['pageNumber'], paragraph['boundingRegions'][0]['polygon'])
-            else:
-                del cu_paragraph["source"]
-            if (cu_paragraph["role"] == ""):
-                del cu_paragraph["role"]
+            # only add the keys that are kept, in the same order as CU
+            cu_paragraph = {}
+            role = paragraph.get("role", "")
+            if (role != ""):
+                cu_paragraph["role"] = role
+            cu_paragraph["content"] = paragraph["content"]
+            bounding_regions = paragraph.get("boundingRegions", None)
+            if (bounding_regions is not None):
+                cu_paragraph["source"] = to_source(bounding_regions[0]['pageNumber'], bounding_regions[0]['polygon'])
+            cu_paragraph["span"] = paragraph["spans"][0]
             cu_results_data["result"]["contents"][0]["paragraphs"].append(cu_paragraph)
 
     # Configuring sections
     if (di_results.get("sections") is not None):
-        cu_results_data["result"]["contents"][0]["sections"] = []
-        for section in di_results["sections"]:
-            cu_section = {
+        cu_results_data["result"]["contents"][0]["sections"] = [
+            {
                 "span": section["spans"][0],
                 "elements": section["elements"]
             }
-            cu_results_data["result"]["contents"][0]["sections"].append(cu_section)
+            for section in di_results["sections"]
+        ]
 
     # Configuring tables
     if (di_results.get("tables") is not None):
@@ -462,7 +549,7 @@ def convert_ocr_to_result(di_ocr_path: Path, target_dir: Path) -> None:
                 if page_number is None or polygon is None:
                     continue
                 # Convert polygon to string format
-                source = convert_bounding_regions_to_source(page_number, polygon)
+                source = to_source(page_number, polygon)
                 sources.append(source)
 
             if sources:
@@ -475,7 +562,7 @@ def convert_ocr_to_result(di_ocr_path: Path, target_dir: Path) -> None:
                 caption = table.get("caption")
                 cu_caption = {
                     "content": caption.get("content", ""),
-                    "source":convert_bounding_regions_to_source(caption["boundingRegions"][0]['pageNumber'], caption['boundingRegions'][0]['polygon']),
+                    "source":to_source(caption["boundingRegions"][0]['pageNumber'], caption['boundingRegions'][0]['polygon']),
                     "span": caption["spans"][0],
                     "elements": caption.get("elements", [])
                 }
@@ -488,14 +575,17 @@ def convert_ocr_to_result(di_ocr_path: Path, target_dir: Path) -> None:
                 for footnote in footnotes:
                     cu_footnote = {
                         "content": footnote["content"],
-                        "source": convert_bounding_regions_to_source(footnote["boundingRegions"][0]['pageNumber'], footnote['boundingRegions'][0]['polygon']),
+                        "source": to_source(footnote["boundingRegions"][0]['pageNumber'], footnote['boundingRegions'][0]['polygon']),
                         "span": footnote["spans"][0],
                         "elements": footnote.get("elements", [])
                     }
                     cu_footnotes.append(cu_footnote)
                 cu_table["footnotes"] = cu_footnotes
 
+            cu_cells = cu_table["cells"]
             for cell in table["cells"]:
+                bounding_region = cell['boundingRegions'][0]
+                spans = cell["spans"]
                 cu_cell = {
                     "kind": cell.get("kind", "content"),
                     "rowIndex": cell["rowIndex"],
@@ -503,38 +593,30 @@ def convert_ocr_to_result(di_ocr_path: Path, target_dir: Path) -> None:
                     "rowSpan": cell.get("rowSpan", 1),
                     "columnSpan": cell.get("columnSpan", 1),
                     "content": cell["content"],
-                    "source": convert_bounding_regions_to_source(cell['boundingRegions'][0]['pageNumber'], cell['boundingRegions'][0]['polygon']),
+                    "source": to_source(bounding_region['pageNumber'], bounding_region['polygon']),
+                    "span": spans[0] if spans else [] # sometimes spans is empty
                 }
 
-                # sometimes spans is empty
-                if (len(cell["spans"]) == 0):
-                    cu_cell["span"] = []
-                else:
-                    cu_cell["span"] = cell["spans"][0]
-
                 # sometimes elements doesn't exist if content isn't blank
-                if (cell.get("elements") is not None):
-                    cu_cell["elements"] = cell["elements"]
-                cu_table["cells"].append(cu_cell)
+                elements = cell.get("elements")
+                if (elements is not None):
+                    cu_cell["elements"] = elements
+                cu_cells.append(cu_cell)
             cu_results_data["result"]["contents"][0]["tables"].append(cu_table)
 
     # Configuring figures
     if (di_results.get("figures") is not None):
         cu_results_data["result"]["contents"][0]["figures"] = []
         for figure in di_results["figures"]:
-            if(figure.get("elements") is not None): # using if block to keep the same order as CU
-                cu_figure = {
-                    "source": convert_bounding_regions_to_source(figure['boundingRegions'][0]['pageNumber'], figure['boundingRegions'][0]['polygon']),
-                    "span": figure["spans"][0],
-                    "elements": figure["elements"],
-                    "id": figure.get("id", "")
-                }
-            else:
-                cu_figure = {
-                    "source": convert_bounding_regions_to_source(figure['boundingRegions'][0]['pageNumber'], figure['boundingRegions'][0]['polygon']),
-                    "span": figure["spans"][0],
-                    "id": figure.get("id", "")
-                }
+            bounding_region = figure['boundingRegions'][0]
+            cu_figure = {
+                "source": to_source(bounding_region['pageNumber'], bounding_region['polygon']),
+                "span": figure["spans"][0]
+            }
+            elements = figure.get("elements")
+            if(elements is not None): # added before the id to keep the same order as CU
+                cu_figure["elements"] = elements
+            cu_figure["id"] = figure.get("id", "")
             cu_results_data["result"]["contents"][0]["figures"].append(cu_figure)
 
     # Write Content Understanding results.json
@@ -542,7 +624,6 @@ def convert_ocr_to_result(di_ocr_path: Path, target_dir: Path) -> None:
     new_path_name = di_ocr_path.name.replace('.ocr', '.result')
     cu_results_path = target_dir / new_path_name
 
-    with open(cu_results_path, 'w') as f:
-        json.dump(cu_results_data, f, indent=4,ensure_ascii=False)
+    write_json(cu_results_path, cu_results_data, pretty)
 
     print(f"[green]Successfully converted Document Intelligence ocr.json to Content Understanding results.json at {cu_results_path}[/green]\n")
@@ -1,7 +1,9 @@
 # imports from built-in packages
+from collections import defaultdict
+from contextlib import suppress
 from dateutil.parser import parse
-from datetime import datetime
-import json
+from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
 import re
 import sys
@@ -12,8 +14,9 @@ from typing import Optional, Tuple
 from rich import print  # For colored output
 
 # imports from same project
-from constants import COMPLETE_DATE_FORMATS, CU_API_VERSION, MAX_FIELD_LENGTH, VALID_CU_FIELD_TYPES
+from constants import ANALYZER_CONFIG, CU_API_VERSION, MAX_FIELD_LENGTH, VALID_CU_FIELD_TYPES, try_parse_date
 from field_definitions import FieldDefinitions
+from json_io import read_json, write_json
 
 # schema constants subject to change
 ANALYZER_FIELDS = "fieldSchema"
@@ -21,23 +24,43 @@ ANALYZER_FIELDS = "fieldSchema"
 # Remember that dynamic tables are arrays and fixed tables are objects
 ANALYZER_DESCRIPTION = "1. Define your schema by specifying the fields you want to extract from the input files. Choose clear and simple `field names`. Use `field descriptions` to provide explanations, exceptions, rules of thumb, and other details to clarify the desired behavior.\n\n2. For each field, indicate the `value type` of the desired output. Besides basic types like strings, dates, and numbers, you can define more complex structures such as `tables` (repeated items with subfields) and `fixed tables` (groups of fields with common subfields)."
 CU_LABEL_SCHEMA = f"https://schema.ai.azure.com/mmi/{CU_API_VERSION}/labels.json"
-
-def convert_bounding_regions_to_source(page_number: int, polygon: list) -> str:
+# dates already in the CU format are kept as is, the rest are parsed with COMPLETE_DATE_FORMATS, then these formats, then dateutil
+ISO_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+FALLBACK_DATE_FORMATS = ["%B %d,%Y", "%B %d, %Y"]
+# used to strip number and integer labels that cannot be converted as is
+NON_NUMERIC_PATTERN = re.compile(r'[^0-9.]')
+NON_DIGIT_PATTERN = re.compile(r'[^0-9]')
+
+@lru_cache(maxsize=16384) # the cells of a table are usually labeled with the same regions
+def convert_bounding_regions_to_source(page_number: int, polygon: tuple) -> str:
     """
     Convert bounding regions to source format.
     Args:
         page_number (int): The page number of the bounding region.
-        polygon (list): The coordinates of the bounding region
+        polygon (tuple): The coordinates of the bounding region, as a tuple so that it can be cached
     Returns:
-        str: The source string in the format D(page_number, x1,y1,x2,y2,...).
+        str: The source string in the format D(page_number, x1,y1,x2,y2,...), with the coordinates rounded to 4 decimal places.
     """
 
-    # Convert polygon to string format
-    polygon_str = ",".join(str(coord) for coord in polygon)
+    # Convert polygon to string format, rounding and formatting each coordinate in a single pass
+    polygon_str = ",".join([str(round(coord, 4)) for coord in polygon])
     source = f"D({page_number},{polygon_str})"
     return source
 
-def convert_fields_to_analyzer_neural(fields_json_path: Path, analyzer_prefix: Optional[str], target_dir: Optional[Path], field_definitions: FieldDefinitions) -> Tuple[dict, dict]:
+def unescape_label_name(label_name: str) -> str:
+    """
+    Unescape a DI label name, where a slash is replaced with ~1 and a ~ is replaced with ~0.
+    Args:
+        label_name (str): The label name (or part of the label name) to unescape.
+    Returns:
+        str: The unescaped label name.
+    """
+    if "~" not in label_name: # most label names don't have anything to unescape
+        return label_name
+    # ~1 has to be replaced first, so that ~01 becomes ~1 instead of /
+    return label_name.replace("~1", "/").replace("~0", "~")
+
+def convert_fields_to_analyzer_neural(fields_json_path: Path, analyzer_prefix: Optional[str], target_dir: Optional[Path], field_definitions: FieldDefinitions, pretty: bool = False) -> Tuple[dict, dict]:
     """
     Convert DI 3.1/4.0GA Custom Neural fields.json to analyzer.json format.
     Args:
@@ -45,37 +68,30 @@ def convert_fields_to_analyzer_neural(fields_json_path: Path, analyzer_prefix: O
         analyzer_prefix (Optional(str)): Prefix for the analyzer name.
         target_dir (Optional[Path]): Output directory for the analyzer.json file.
         field_definitions (FieldDefinitions): Field definitions object to store field definitions for analyzer.json if there are any fixed tables.
+        pretty (bool): Whether to indent the analyzer.json file.
     Returns:
         Tuple[dict, dict]: The analyzer data and a dictionary of the fields and their types for label conversion.
+            - "primary" maps the name of each field (including the tables) to its type.
+            - "array" maps the name of each dynamic table to the types of its columns.
+            - "object" maps the name of each fixed table to the types of the columns of each of its rows.
     """
-    try:
-        with open(fields_json_path, 'r', encoding="utf-8") as f:
-            fields_data = json.load(f)
-    except FileNotFoundError:
-        print(f"[red]Error: fields.json file not found at {fields_json_path}.[/red]")
-        sys.exit(1)
-    except json.JSONDecodeError:
-        print("[red]Error: Invalid JSON in fields.json.[/red]")
-        sys.exit(1)
+    fields_data = read_json(fields_json_path, "fields.json")
 
     # Good to do before each analyzer.json conversion
     field_definitions.clear_definitions()
 
     # Need to store the fields and types, so that we can access them when converting the labels.json files
-    fields_dict = {}
+    fields_dict = {
+        "primary": {},
+        "array": {},
+        "object": {},
+    }
 
     # Build analyzer.json content
     analyzer_data = {
         "analyzerId": analyzer_prefix,
         "baseAnalyzerId": "prebuilt-documentAnalyzer",
-        "config": {
-            "returnDetails": True,
-            # Add the following line as a temp workaround before service issue is fixed.
-            "enableLayout": True,
-            "enableBarcode": False,
-            "enableFormula": False,
-            "estimateFieldSourceAndConfidence": True
-        },
+        "config": ANALYZER_CONFIG,
         ANALYZER_FIELDS: {
             "name": analyzer_prefix,
             "description": ANALYZER_DESCRIPTION,
@@ -107,19 +123,17 @@ def convert_fields_to_analyzer_neural(fields_json_path: Path, analyzer_prefix: O
             "description": field.get("description", "")
         }
 
-        fields_dict[analyzer_key] = analyzer_type # Adds the field type to our dictionary
+        fields_dict["primary"][analyzer_key] = analyzer_type # Adds the field type to our dictionary
 
         if analyzer_type == "array": # for dynamic tables
             analyzer_field["method"] = "generate"
             # need to get the items from the definition
             item_definition = definitions.get(field.get("itemType"))
-            array_fields_dict, analyzer_field["items"] = convert_array_items(analyzer_key, item_definition)
-            fields_dict.update(array_fields_dict)
+            fields_dict["array"][analyzer_key], analyzer_field["items"] = convert_array_items(item_definition)
 
         elif analyzer_type == "object": # for fixed tables
             analyzer_field["method"] = "generate"
-            object_fields_dict, analyzer_field["properties"] = convert_object_properties(field, definitions, analyzer_key, field_definitions)
-            fields_dict.update(object_fields_dict)
+            fields_dict["object"][analyzer_key], analyzer_field["properties"] = convert_object_properties(field, definitions, analyzer_key, field_definitions)
 
         # Add to analyzer fields
         analyzer_data[ANALYZER_FIELDS]["fields"][analyzer_key] = analyzer_field
@@ -136,22 +150,20 @@ def convert_fields_to_analyzer_neural(fields_json_path: Path, analyzer_prefix: O
     analyzer_json_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Write analyzer.json
-    with open(analyzer_json_path, 'w') as f:
-        json.dump(analyzer_data, f, indent=4)
+    write_json(analyzer_json_path, analyzer_data, pretty)
 
     print(f"[green]Successfully converted {fields_json_path} to analyzer.json at {analyzer_json_path}[/green]\n")
 
     return analyzer_data, fields_dict
 
-def convert_array_items(analyzer_key: str, item_definition: dict) -> Tuple[dict, dict]:
+def convert_array_items(item_definition: dict) -> Tuple[dict, dict]:
     """
     Helper function to convert array items for the analyzer.
     Args:
-        analyzer_key (str): The dictionary key for the array item (i.e., the name of the dynamic table).
         item_definition (dict): The item definition from the fields.json file (i.e. the itemType value)
     Returns:
         Tuple[dict, dict]: A tuple containing two dictionaries:
-            - The first dictionary contains the field names and types for the array items.
+            - The first dictionary contains the column names and types for the array items.
             - The second dictionary contains the items or rows within the dynamic table
     """
     array_fields_dict = {}
@@ -171,7 +183,7 @@ def convert_array_items(analyzer_key: str, item_definition: dict) -> Tuple[dict,
         }
         if column.get("fieldFormat") != "not-specified":
             items["properties"][column_key]["format"] = column.get("fieldFormat")
-        array_fields_dict[f"{analyzer_key}/{column_key}"] = column_type
+        array_fields_dict[column_key] = column_type
 
     return array_fields_dict, items
 
@@ -185,22 +197,26 @@ def convert_object_properties(field: dict, definitions: dict, analyzer_key: str,
         field_definitions (FieldDefinitions): Field definitions object to store field definitions for analyzer.json if there are any fixed tables.
     Returns:
         Tuple[dict, dict]: A tuple containing two dictionaries:
-            - The first dictionary contains the field names in fott format and types for the object properties.
+            - The first dictionary contains the column names and types for each row of the object properties.
             - The second dictionary contains the properties or rows within the fixed table
     """
     object_fields_dict = {}
     properties = {}
     di_rows = field.get("fields", [])
-    first_row_name = di_rows[0].get("fieldKey") if di_rows else ""
+    if not di_rows:
+        return object_fields_dict, properties
 
-    for i, di_row in enumerate(di_rows):
-        if i == 0:
-            row_definition = definitions.get(di_row.get("fieldType"))
-            column_fields_dict = _add_object_definition(row_definition, analyzer_key, first_row_name, field_definitions)
+    # all rows of a fixed table share the definition of the first row
+    first_row_name = di_rows[0].get("fieldKey")
+    row_definition = definitions.get(di_rows[0].get("fieldType"))
+    column_fields_dict = _add_object_definition(row_definition, analyzer_key, first_row_name, field_definitions)
+    # the reference is never modified after this, so one dict can be shared by all rows
+    row_reference = {"$ref": f"#/$defs/{analyzer_key}_{first_row_name}"}
+
+    for di_row in di_rows:
         row_name = di_row.get("fieldKey")
-        properties[row_name] = {"$ref": f"#/$defs/{analyzer_key}_{first_row_name}"}
-        for column_name, column_type in column_fields_dict.items():
-            object_fields_dict[f"{analyzer_key}\\{row_name}\\{column_name}"] = column_type # we're flipping the direction of the slash (from / to \) to cause a miss in the dictionary when looking up the field
+        properties[row_name] = row_reference
+        object_fields_dict[row_name] = column_fields_dict # all rows have the same columns
 
     return object_fields_dict, properties
 
@@ -245,20 +261,12 @@ def convert_di_labels_to_cu_neural(di_labels_path: Path, target_dir: Path, field
     Args:
         di_labels_path (Path): Path to the Document Intelligence labels.json file.
         target_dir (Path): Output directory for the Content Understanding labels.json file.
-        fields_dict (dict): Dictionary of field names and types for the labels.json conversion.
+        fields_dict (dict): Dictionary of field names and types for the labels.json conversion, as returned by convert_fields_to_analyzer_neural.
         removed_signatures (list): List of removed signatures that we will skip when converting the labels.json file.
     Returns:
         dict: The Content Understanding labels.json data.
     """
-    try:
-        with open(di_labels_path, 'r', encoding="utf-8") as f:
-            di_data = json.load(f)
-    except FileNotFoundError:
-        print(f"[red]Error: Document Intelligence labels.json file not found at {di_labels_path}.[/red]")
-        sys.exit(1)
-    except json.JSONDecodeError:
-        print("[red]Error: Invalid JSON in Document Intelligence labels.json.[/red]")
-        sys.exit(1)
+    di_data = read_json(di_labels_path, "Document Intelligence labels.json")
 
     # Start building Content Understanding labels.json
     cu_data = {
@@ -269,36 +277,43 @@ def convert_di_labels_to_cu_neural(di_labels_path: Path, target_dir: Path, field
     }
 
     labels = di_data.get("labels", {})
+    removed_signatures = set(removed_signatures)
+    # rows of the dynamic tables, grouped by table and row number, so that each valueArray can be built at once after all labels are converted
+    # this is because sometimes the first label for that table is not for the first row
+    dynamic_table_rows = defaultdict(dict)
 
     for label in labels:
         label_name = label.get("label", None)
-        converted_label_name = label_name # for escape logic
-        converted_label_name = converted_label_name.replace("~1", "/") # if a slash exists in the label_name, it is replaced with ~1
-        converted_label_name = converted_label_name.replace("~0", "~") # if a ~ exists in the label_name, it is replaced with ~0
+        converted_label_name = unescape_label_name(label_name)
 
-        label_type = fields_dict.get(label_name, None) # if primitive type, label_type will not be None
-        converted_label_type = fields_dict.get(converted_label_name, None)
-
-        if label_name in removed_signatures or converted_label_name in removed_signatures:
+        # the raw label name only needs its own check if it was escaped, otherwise it is the same string
+        if converted_label_name in removed_signatures or (converted_label_name is not label_name and label_name in removed_signatures):
             # Skip the label if it is in the removed_signatures list
             continue
 
-        if label_type is None and converted_label_type is None: # for dynamic and fixed tables
+        # the keys of fields_dict are not escaped, so only the converted label name needs to be looked up
+        converted_label_type = fields_dict["primary"].get(converted_label_name, None) # if primitive type, converted_label_type will not be None
+
+        if converted_label_type is None: # for dynamic and fixed tables
             # divide the label_name into table_name, rowNumber/Name, and column_name
             # Example for dynamic tables: ItemList/0/NumOfPackage --> row is number
             # Example for fixed tables: table/wiring/part --> row is name
 
             parts = label_name.split("/",2)
-            table_name = parts[0].replace("~1", "/").replace("~0", "~")
-            row = parts[1].replace("~1", "/").replace("~0", "~")
-            column_name = parts[2].replace("~1", "/").replace("~0", "~")
+            table_name, row, column_name = (unescape_label_name(part) for part in parts)
 
             # determine if the table is a fixed or dynamic table
-            table_type = fields_dict.get(table_name)
+            table_type = fields_dict["primary"].get(table_name)
             label_type = table_type
 
             if label_type == "array": # for dynamic tables
+                # the row of a dynamic table is its index in the valueArray, so it is parsed once here
+                row_number = int(row) if row.isdecimal() else -1
+                if row_number < 0:
+                    print(f"[yellow]WARNING: Skipping label '{label_name}' as '{row}' is not a valid row number for dynamic table '{table_name}'.[/yellow]")
+                    continue
                 # need to check if the table already exists & if it doesnt, need to create the cu_label for the table
+                # the table is added right away to keep the order of the fieldLabels, its valueArray is filled in at the end
                 if table_name not in cu_data["fieldLabels"]:
                     cu_label = {
                         "type": label_type,
@@ -307,29 +322,20 @@ def convert_di_labels_to_cu_neural(di_labels_path: Path, target_dir: Path, field
                     }
                     # Add table to fieldLabels
                     cu_data["fieldLabels"][table_name] = cu_label
-                # need to check if any rows have been defined yet in valueArray
-                if len(cu_data["fieldLabels"][table_name]["valueArray"]) == 0:
-                    value_object = {
-                        "type": "object",
-                        "kind": label.get("kind", "confirmed"),
-                        "valueObject": {}
-                    }
-                    cu_data["fieldLabels"][table_name]["valueArray"].append(value_object)
-                # check if the amount of valueObjects match the rowNumber, if not --> add that many rows
-                # this is because sometimes the first label for that table is not for the first row
-                if len(cu_data["fieldLabels"][table_name]["valueArray"]) <= int(row):
-                    value_object = {
+                # need to check if row has been defined, if not define it
+                table_rows = dynamic_table_rows[table_name]
+                row_object = table_rows.get(row_number)
+                if row_object is None:
+                    row_object = {
                         "type": "object",
                         "kind": label.get("kind", "confirmed"),
                         "valueObject": {}
                     }
-                    number_of_rows_missing = int(row) - len(cu_data["fieldLabels"][table_name]["valueArray"]) + 1
-                    for i in range(number_of_rows_missing):
-                        cu_data["fieldLabels"][table_name]["valueArray"].append(value_object)
+                    table_rows[row_number] = row_object
 
                 # actually need to add the column to the valueObject
-                label_type = fields_dict.get(f"{table_name}/{column_name}")
-                cu_data["fieldLabels"][table_name]["valueArray"][int(row)]["valueObject"][column_name] = creating_cu_label_for_neural(label, label_type)
+                label_type = fields_dict["array"][table_name].get(column_name)
+                row_object["valueObject"][column_name] = creating_cu_label_for_neural(label, label_type)
 
             elif label_type == "object": # for fixed tables
                 # need to check if the table already exists & if it doesnt, need to create the cu_label for the table
@@ -351,16 +357,49 @@ def convert_di_labels_to_cu_neural(di_labels_path: Path, target_dir: Path, field
                     cu_data["fieldLabels"][table_name]["valueObject"][row] = value_object
 
                 # actually need to add the column to the valueObject
-                label_type = fields_dict.get(f"{table_name}\\{row}\\{column_name}")
+                label_type = fields_dict["object"][table_name].get(row, {}).get(column_name)
                 cu_data["fieldLabels"][table_name]["valueObject"][row]["valueObject"][column_name] = creating_cu_label_for_neural(label, label_type)
         else:
             # Add field to fieldLabels
-            label_name = converted_label_name
-            label_type = converted_label_type
-            cu_data["fieldLabels"][label_name] = creating_cu_label_for_neural(label, label_type)
+            cu_data["fieldLabels"][converted_label_name] = creating_cu_label_for_neural(label, converted_label_type)
+
+    # Build the valueArray of each dynamic table in one go, rows without any labels are added as empty rows
+    for table_name, table_rows in dynamic_table_rows.items():
+        table_kind = cu_data["fieldLabels"][table_name]["kind"]
+        cu_data["fieldLabels"][table_name]["valueArray"] = [
+            table_rows.get(row_number) or {"type": "object", "kind": table_kind, "valueObject": {}}
+            for row_number in range(max(table_rows) + 1)
+        ]
 
     return cu_data
 
+@lru_cache(maxsize=4096) # the same dates are usually labeled across many documents of a dataset
+def normalize_date(original_date: str) -> str:
+    """
+    Normalize a date label to the CU date format.
+    Args:
+        original_date (str): The content of the date label.
+    Returns:
+        str: The date in "%Y-%m-%d" format, or the original content if no format works.
+    """
+    # dates can be dmy, mdy, ydm, or not specified
+    # for CU, the format of our dates should be "%Y-%m-%d"
+    if ISO_DATE_PATTERN.fullmatch(original_date): # dates seem to be normalized already most of the time
+        with suppress(ValueError):
+            date.fromisoformat(original_date) # only kept as is if it is a valid date
+            return original_date
+    date_obj = try_parse_date(original_date) # going with the first format that works
+    if date_obj is not None:
+        return date_obj.strftime("%Y-%m-%d")
+    # unable to find a format that works, so trying the month name formats and then dateutil
+    for fmt in FALLBACK_DATE_FORMATS:
+        with suppress(ValueError):
+            return datetime.strptime(original_date, fmt).strftime("%Y-%m-%d")
+    try:
+        return parse(original_date).date().strftime("%Y-%m-%d")
+    except (ValueError, OverflowError):
+        return original_date # going with the default
+
 def creating_cu_label_for_neural(label:dict, label_type: str) -> dict:
     """
     Create a CU label for DI 3.1/4.0 Custom Neural format labels.json.
@@ -376,36 +415,22 @@ def creating_cu_label_for_neural(label:dict, label_type: str) -> dict:
     label_kind = label.get("kind", "confirmed")
     label_meta_data = label.get("metadata", {})
 
-    value_list = label.get("value") # comes from the label itself & is a list of {page, text, & bounding boxes}
-    content = ""
-    bounding_regions = []
-
-    for value in value_list:
-        content += value.get("text") + " "
-        bounding_boxes = value.get("boundingBoxes")[0]
-        page_number = value.get("page")
-        rounded_regions = [round(value, 4) for value in bounding_boxes] # round to 4 decimal places
-        bounding_regions.append(
-            {
-                "pageNumber": page_number,
-                "polygon": rounded_regions
-            }
-        )
+    value_list = label.get("value") or [] # comes from the label itself & is a list of {page, text, & bounding boxes}
 
     # Dates seem to be normalized already, but need to convert numbers and integers into the right format of float or int
-    final_content = content.strip() # removes trailing space
+    final_content = " ".join(value.get("text") for value in value_list).strip()
     if label_type == "number":
         try:
             final_content = float(final_content)
         except Exception as ex:
             # strip the string of all non-numerical values and periods
             string_value = final_content
-            cleaned_string = re.sub(r'[^0-9.]', '', string_value)
+            cleaned_string = NON_NUMERIC_PATTERN.sub('', string_value)
             cleaned_string = cleaned_string.strip('.')  # Remove any leading or trailing periods
             # if more than one period exists, remove them all
             if cleaned_string.count('.') > 1:
                 print("More than one decimal point exists, so will be removing them all.")
-                cleaned_string = cleaned_string = re.sub(r'\.', '', string_value)
+                cleaned_string = cleaned_string.replace('.', '')
             final_content = float(cleaned_string)
     elif label_type == "integer":
         try:
@@ -413,47 +438,17 @@ def creating_cu_label_for_neural(label:dict, label_type: str) -> dict:
         except Exception as ex:
             # strip the string of all non-numerical values
             string_value = final_content
-            cleaned_string = re.sub(r'[^0-9]', '', string_value)
+            cleaned_string = NON_DIGIT_PATTERN.sub('', string_value)
             final_content = int(cleaned_string)
     elif label_type == "date":
-        # dates can be dmy, mdy, ydm, or not specified
-        # for CU, the format of our dates should be "%Y-%m-%d"
-        original_date = final_content
-        format_name = "not specified"
-        for fmt in COMPLETE_DATE_FORMATS:
-            try:
-                date_obj = datetime.strptime(original_date, fmt)
-                final_content = date_obj.strftime("%Y-%m-%d")
-                format_name = fmt
-                break # going with the first format that works
-            except ValueError:
-                continue
-        if format_name == "not specified": # unable to find a format that works
-            formats_to_try = ["%B %d,%Y", "parse", "%B %d, %Y", "%m/%d/%Y"]
-            finished_date_normalization = False # to keep track of whether we have finished normalizing the date, if not, date will be set to original_date
-            for fmt in formats_to_try:
-                try:
-                    if fmt == "parse":
-                        final_content = parse(original_date).date().strftime("%Y-%m-%d")
-                    else:
-                        date_obj = datetime.strptime(original_date, fmt)
-                        final_content = date_obj.strftime("%Y-%m-%d")
-                    finished_date_normalization = True
-                except Exception as ex:
-                    continue
-            if not finished_date_normalization:
-                final_content = original_date # going with the default
-
-    # Convert bounding_regions to source
-    sources = []
-    for region in bounding_regions:
-        page_number = region.get("pageNumber")
-        polygon = region.get("polygon")
-        if page_number is None or polygon is None:
-            continue
-        # Convert polygon to string format
-        source = convert_bounding_regions_to_source(page_number, polygon)
-        sources.append(source)
+        final_content = normalize_date(final_content)
+
+    # Convert the bounding boxes of the values with a page to source
+    sources = [
+        convert_bounding_regions_to_source(value.get("page"), tuple(value.get("boundingBoxes")[0]))
+        for value in value_list
+        if value.get("page") is not None
+    ]
 
     cu_label = {
         "type": label_type,
@@ -1,10 +1,13 @@
 # imports from built-in packages
 from azure.identity import DefaultAzureCredential
 from azure.storage.blob import BlobClient, ContainerClient
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dotenv import load_dotenv
-import json
+from itertools import repeat
 import os
 from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
 import shutil
 import tempfile
 import typer
@@ -14,15 +17,41 @@ from typing import Tuple
 from rich import print  # For colored output
 
 # imports from same project
-from constants import DI_VERSIONS, FIELDS_JSON, LABELS_JSON, MAX_FIELD_COUNT, OCR_JSON, VALIDATION_TXT
+from constants import DI_VERSIONS, FIELDS_JSON, LABELS_JSON, MAX_BLOB_TRANSFER_WORKERS, MAX_FIELD_COUNT, OCR_JSON, VALIDATION_TXT
 import cu_converter_neural as cu_converter_neural
 import cu_converter_generative as cu_converter_generative
 from field_definitions import FieldDefinitions
 import field_type_conversion
 from get_ocr import run_cu_layout_ocr
+from json_io import loads_json, read_json, write_json
 
 app = typer.Typer()
 
+# minimum number of labels.json files in a dataset before they are converted in worker processes
+PARALLEL_LABELS_MIN_FILES = 8
+
+def count_primitive_field(*_) -> int:
+    """
+    Function to count a primitive field, which is a single field no matter its type
+    Returns:
+        int: The number of fields, i.e. 1
+    """
+    return 1
+
+# number of fields that each table field of a generative fields.json accounts for, given the field
+# a fixed table counts its rows, the columns of its first row, and 2 for the table and the row definition
+GENERATIVE_FIELD_COUNTS = {
+    "array": lambda field: len(field["items"]["properties"]) + 1,
+    "object": lambda field: len(field["properties"]) + len(next(iter(field["properties"].values()))["properties"]) + 2,
+}
+
+# number of fields that each table field of a neural fields.json accounts for, given the field and the definitions
+NEURAL_FIELD_COUNTS = {
+    "array": lambda field, definitions: len(definitions[field["itemType"]]["fields"]) + 1,
+    "object": lambda field, definitions: len(field["fields"]) + len(definitions[field["fields"][0]["fieldType"]]["fields"]) + 2,
+    "signature": lambda field, definitions: 0, # will be skipping over signature fields anyways, shouldn't add to field count
+}
+
 def validate_field_count(DI_version, byte_fields) -> Tuple[int, bool]:
     """
     Function to check if the fields.json is valid
@@ -34,47 +63,23 @@ def validate_field_count(DI_version, byte_fields) -> Tuple[int, bool]:
         field_count (int): The number of fields in the fields.json file
         is_valid (bool): True if the fields.json file is valid, False otherwise
     """
-    string_fields = byte_fields.decode("utf-8")
-    fields = json.loads(string_fields)
+    fields = loads_json(byte_fields)
 
-    field_count = 0
     if DI_version == "generative":
         field_schema = fields["fieldSchema"]
         if len(field_schema) > MAX_FIELD_COUNT:
             return len(field_schema), False
-        for _, field in field_schema.items(): # need to account for tables
-            if field["type"] == "array":
-                field_count += (len(field["items"]["properties"]) + 1)
-            elif field["type"] == "object":
-                number_of_rows = len(field["properties"])
-                _, first_row_value = next(iter(field["properties"].items()))
-                number_of_columns = len(first_row_value["properties"])
-                field_count += (number_of_rows + number_of_columns + 2)
-            else:
-                field_count += 1 # need to account for other primitive fields
-        if field_count > MAX_FIELD_COUNT:
-            return field_count, False
+        # need to account for tables, other primitive fields count as 1
+        field_count = sum(GENERATIVE_FIELD_COUNTS.get(field["type"], count_primitive_field)(field) for field in field_schema.values())
     else: # DI 3.1/4.0 GA Custom Neural
         field_schema = fields["fields"]
         definitions = fields["definitions"]
-        if len(fields) > MAX_FIELD_COUNT:
-            return len(fields), False
-        for field in field_schema:
-            if field["fieldType"] == "array":
-                definition = definitions[field["itemType"]]
-                field_count += (len(definition["fields"]) + 1)
-            elif field["fieldType"] == "object":
-                number_of_rows = len(field["fields"])
-                row_definition = field["fields"][0]["fieldType"]
-                definition = definitions[row_definition]
-                number_of_columns = len(definition["fields"])
-                field_count += (number_of_rows + number_of_columns + 2)
-            elif field["fieldType"] == "signature":
-                continue # will be skipping over signature fields anyways, shouldn't add to field count
-            else:
-                field_count += 1 # need to account for other primitive fields
-        if field_count > MAX_FIELD_COUNT:
-            return field_count, False
+        if len(field_schema) > MAX_FIELD_COUNT:
+            return len(field_schema), False
+        # need to account for tables, other primitive fields count as 1
+        field_count = sum(NEURAL_FIELD_COUNTS.get(field["fieldType"], count_primitive_field)(field, definitions) for field in field_schema)
+    if field_count > MAX_FIELD_COUNT:
+        return field_count, False
     print(f"[green]Successfully validated fields.json. Number of fields: {field_count}[/green]")
     return field_count, True
 
@@ -86,6 +91,9 @@ def main(
     source_blob_folder: str = typer.Option("", "--source-blob-folder", help="Source blob storage folder prefix."),
     target_container_sas_url: str = typer.Option("", "--target-container-sas-url", help="Target blob container SAS URL."),
     target_blob_folder: str = typer.Option("", "--target-blob-folder", help="Target blob storage folder prefix."),
+    pretty: bool = typer.Option(False, "--pretty", help="Indent the converted analyzer.json, labels.json and result.json files."),
+    blob_concurrency: int = typer.Option((os.cpu_count() or 1) * 2, "--blob-concurrency", help="Number of parallel connections used to download or upload each large blob."),
+    ocr_concurrency: int = typer.Option(4, "--ocr-concurrency", help="Number of PDF files to run CU Layout on at the same time (up to 40)."),
 ) -> None:
     """
     Wrapper tool to convert an entire DI dataset to CU format
@@ -110,129 +118,213 @@ def main(
     temp_source_dir = Path(tempfile.mkdtemp())
     temp_target_dir = Path(tempfile.mkdtemp())
 
+    # Shared session for the source and target blob storage, with enough pooled connections for all of the parallel transfers
+    # Without this, the parallel transfers would keep opening new connections once the default pool of 10 connections is in use
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=MAX_BLOB_TRANSFER_WORKERS * blob_concurrency))
+
     # Configure access to source blob storage
-    container_client = ContainerClient.from_container_url(source_container_sas_url)
+    container_client = ContainerClient.from_container_url(source_container_sas_url, session=session, connection_timeout=30, read_timeout=300, retry_total=5)
 
     # List of blobs under the "folder" in source
-    blob_list = container_client.list_blobs(name_starts_with=source_blob_folder)
+    blob_names = [blob.name for blob in container_client.list_blobs(name_starts_with=source_blob_folder)]
 
-    for blob in blob_list: # each file is a blob that's being read into local directory
-        print(f"Reading: {blob.name}")
-        blob_client = container_client.get_blob_client(blob.name)
-        content = blob_client.download_blob().readall()
-
-        # Create local file path (preserving folder structure)
-        filename = Path(blob.name).name
-        local_file_path = temp_source_dir /filename
-        local_file_path.parent.mkdir(parents=True, exist_ok=True)
-
-        if filename == FIELDS_JSON:
-            print(f"[yellow]Checking if fields.json is valid for being able to create an analyzer.[/yellow]")
-            fields_count, is_valid = validate_field_count(DI_version, content)
-            assert is_valid, f"Too many fields in fields.json, we only support up to {MAX_FIELD_COUNT} fields. Right now, you have {fields_count} fields."
-
-        # Write to file
-        with open(local_file_path, "wb") as f:
-            f.write(content)
-            print(f"Writing to {local_file_path}")
+    # each file is a blob that's being read into local directory, downloading several at a time as this is bound by the round-trips to blob storage
+    with ThreadPoolExecutor(max_workers=MAX_BLOB_TRANSFER_WORKERS) as executor:
+        # consuming the results raises the first error, after which the executor waits for the remaining downloads
+        list(executor.map(lambda blob_name: download_blob_to_dir(container_client, blob_name, temp_source_dir, DI_version, blob_concurrency), blob_names))
 
     # Confirming access to target blob storage here because doing so before can cause SAS token to expire
     # Additionally, best to confirm access to target blob storage before running any conversion
-    target_container_client = ContainerClient.from_container_url(target_container_sas_url)
+    target_container_client = ContainerClient.from_container_url(target_container_sas_url, session=session, connection_timeout=30, read_timeout=300, retry_total=5)
 
     # First need to run field type conversion --> Then run DI to CU conversion
-    # Creating a temporary directory to store field type converted dataset
-    # Without this temp directory, your ocr.json files will not be carried over for cu conversion
-    # DI dataset converter will use temp directory as its source
-    # TO DO: remove the instance of temp_dir all together and rely on source_target_dir for field type conversion only
-    temp_dir = Path(tempfile.mkdtemp())
-
-    for item in temp_source_dir.iterdir():
-        shutil.copy2(item, temp_dir / item.name)
-
-    print(f"Creating temporary directory for running valid field type conversion. Output will be temporary stored at {temp_dir}...")
-
+    # The field type conversion rewrites the fields.json (and labels.json files) of the downloaded dataset in place,
+    # which is safe because write_json replaces each file, and the DI to CU conversion then uses the downloaded dataset as its source
     print("First: Running valid field type conversion...")
     print("[yellow]WARNING: if any signature fields are present, they will be skipped...[/yellow]\n")
-    # Taking the input source dir, and converting the valid field types into temp_dir
-    removed_signatures = running_field_type_conversion(temp_source_dir, temp_dir, DI_version)
+    # Taking the input source dir, and converting the valid field types in place
+    removed_signatures = running_field_type_conversion(temp_source_dir, temp_source_dir, DI_version)
 
     if len(removed_signatures) > 0:
         print(f"[yellow]WARNING: The following signatures were removed from the dataset: {removed_signatures}[/yellow]\n")
 
     print("Second: Running DI to CU dataset conversion...")
-    analyzer_data, ocr_files = running_cu_conversion(temp_dir, temp_target_dir, DI_version, analyzer_prefix, removed_signatures)
+    analyzer_data, ocr_files = running_cu_conversion(temp_source_dir, temp_target_dir, DI_version, analyzer_prefix, removed_signatures, pretty)
 
     # Run OCR on the pdf files
-    run_cu_layout_ocr(ocr_files, temp_target_dir, subscription_key)
+    run_cu_layout_ocr(ocr_files, temp_target_dir, subscription_key, ocr_concurrency, pretty)
     print(f"[green]Successfully finished running CU Layout on all PDF files[/green]\n")
 
     # After processing files in temp_target_dir
     print("Uploading contents of temp_target_dir to target blob storage...")
 
+    uploads = []
     for item in temp_target_dir.rglob("*"):  # Recursively iterate through all files and directories
         if item.is_file():  # Only upload files
             # Create the blob path by preserving the relative path structure
-            blobPath = str(item.relative_to(temp_target_dir)).replace('\\', '/') # Ensure path uses forward slashes
-            blob_path = target_blob_folder + "/" + blobPath
-            print(f"Uploading {item} to blob path {blob_path}...")
-
-            # Create a BlobClient for the target blob
-            blob_client = target_container_client.get_blob_client(blob_path)
+            blob_path = f"{target_blob_folder}/{item.relative_to(temp_target_dir).as_posix()}" # as_posix ensures path uses forward slashes
+            uploads.append((item, blob_path))
 
-            # Upload the file
-            with open(item, "rb") as data:
-                blob_client.upload_blob(data, overwrite=True)
+    with ThreadPoolExecutor(max_workers=MAX_BLOB_TRANSFER_WORKERS) as executor:
+        list(executor.map(lambda upload: upload_file_to_blob(target_container_client, *upload, blob_concurrency), uploads))
 
     print("[green]Successfully uploaded all files to target blob storage.[/green]")
 
+def download_blob_to_dir(container_client: ContainerClient, blob_name: str, local_dir: Path, DI_version: str, max_concurrency: int = 1) -> None:
+    """
+    Function to download a blob into the local directory, validating the fields.json along the way
+    Args:
+        container_client (ContainerClient): The client of the source blob container
+        blob_name (str): The name of the blob to download
+        local_dir (Path): The path to the local directory to write the blob to
+        DI_version (str): The version of DI being used
+        max_concurrency (int): The number of parallel connections used to download the blob if it is large enough to be downloaded in chunks
+    """
+    print(f"Reading: {blob_name}")
+    blob_client = container_client.get_blob_client(blob_name)
+    downloader = blob_client.download_blob(max_concurrency=max_concurrency)
+
+    # Create local file path (preserving folder structure)
+    filename = Path(blob_name).name
+    local_file_path = local_dir / filename
+    local_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if filename == FIELDS_JSON:
+        # only the fields.json needs to be held in memory, so that it can be validated before being written
+        content = downloader.readall()
+        print(f"[yellow]Checking if fields.json is valid for being able to create an analyzer.[/yellow]")
+        fields_count, is_valid = validate_field_count(DI_version, content)
+        assert is_valid, f"Too many fields in fields.json, we only support up to {MAX_FIELD_COUNT} fields. Right now, you have {fields_count} fields."
+        local_file_path.write_bytes(content)
+    else:
+        # the rest of the files are streamed straight to disk, so large pdf files are never fully held in memory
+        with open(local_file_path, "wb") as f:
+            downloader.readinto(f)
+    print(f"Writing to {local_file_path}")
+
+def upload_file_to_blob(container_client: ContainerClient, file_path: Path, blob_path: str, max_concurrency: int = 1) -> None:
+    """
+    Function to upload a local file to a blob
+    Args:
+        container_client (ContainerClient): The client of the target blob container
+        file_path (Path): The path to the local file to upload
+        blob_path (str): The path of the blob to upload the file to
+        max_concurrency (int): The number of parallel connections used to upload the file if it is large enough to be uploaded in blocks
+    """
+    print(f"Uploading {file_path} to blob path {blob_path}...")
+
+    # Create a BlobClient for the target blob
+    blob_client = container_client.get_blob_client(blob_path)
+
+    # Upload the file, streaming it from disk so that large files are uploaded in blocks without being read into memory
+    # Passing the length lets the SDK choose between a single put and a block upload up front, instead of buffering the stream to find out
+    with open(file_path, "rb") as data:
+        blob_client.upload_blob(data, length=os.fstat(data.fileno()).st_size, overwrite=True, max_concurrency=max_concurrency)
+
+def list_dataset_files(dataset_dir: Path) -> list:
+    """
+    Function to list the names of the files in a dataset directory
+    The blobs are downloaded without their folders, so the dataset directory is flat and a single scan finds all of the files
+    Args:
+        dataset_dir (Path): The path to the dataset directory
+    Returns:
+        list: The names of the files in the dataset directory
+    """
+    with os.scandir(dataset_dir) as entries:
+        return [entry.name for entry in entries if entry.is_file()]
+
 def running_field_type_conversion(temp_source_dir: Path, temp_dir: Path, DI_version: str) -> list:
     """
     Function to run the field type conversion
     Args:
         temp_source_dir (Path): The path to the source directory
-        temp_dir (Path): The path to the target directory
+        temp_dir (Path): The path to the target directory, which can be the source directory to convert the files in place
         DI_version (str): The version of DI being used
     Returns:
         removed_signatures (list): The list of removed signatures as they will not be used in the CU converter
     """
     # Taking the input source dir, and converting the valid field types into temp_dir
-    for root, dirs, files in os.walk(temp_source_dir):
-        root_path = Path(root)
-        fields_path = root_path / FIELDS_JSON
-
-        converted_fields = {}
-        converted_field_keys = {}
-        removed_signatures = []
-
-        assert fields_path.exists(), "fields.json is needed. Fields.json is missing from the given dataset."
-        with fields_path.open("r", encoding="utf-8") as fp: # running field type conversion for fields.json
-            fields = json.load(fp)
-
-        if DI_version == "generative":
-            converted_fields, converted_field_keys = field_type_conversion.update_unified_schema_fields(fields)
-            with open(str(temp_dir / FIELDS_JSON), "w", encoding="utf-8") as fp:
-                json.dump(converted_fields, fp, ensure_ascii=False, indent=4)
-            print("[yellow]Successfully handled field type conversion for DI 4.0 preview Custom Document fields.json[/yellow]\n")
-        elif DI_version == "neural":
-            removed_signatures, converted_fields = field_type_conversion.update_fott_fields(fields)
-            with open(str(temp_dir / FIELDS_JSON), "w", encoding="utf-8") as fp:
-                json.dump(converted_fields, fp, ensure_ascii=False, indent=4)
-            print("[yellow]Successfully handled field type conversion for DI 3.1/4.0 GA Custom Document fields.json[/yellow]\n")
-
-        if DI_version == "generative":
-            for file in files:
-                file_path = root_path / file
-                if (file.endswith(LABELS_JSON)):
-                    # running field type conversion for labels.json
-                    with file_path.open("r", encoding="utf-8") as fp:
-                        labels = json.load(fp)
-                    field_type_conversion.update_unified_schema_labels(labels, converted_field_keys, temp_dir / file)
-                    print(f"[yellow]Successfully handled field type conversion for {file}[/yellow]\n")
+    fields_path = temp_source_dir / FIELDS_JSON
+
+    converted_fields = {}
+    converted_field_keys = {}
+    removed_signatures = []
+
+    assert fields_path.exists(), "fields.json is needed. Fields.json is missing from the given dataset."
+    fields = read_json(fields_path, "fields.json") # running field type conversion for fields.json
+
+    if DI_version == "generative":
+        converted_fields, converted_field_keys = field_type_conversion.update_unified_schema_fields(fields)
+        write_json(temp_dir / FIELDS_JSON, converted_fields)
+        print("[yellow]Successfully handled field type conversion for DI 4.0 preview Custom Document fields.json[/yellow]\n")
+    elif DI_version == "neural":
+        removed_signatures, converted_fields = field_type_conversion.update_fott_fields(fields)
+        write_json(temp_dir / FIELDS_JSON, converted_fields)
+        print("[yellow]Successfully handled field type conversion for DI 3.1/4.0 GA Custom Document fields.json[/yellow]\n")
+
+    if DI_version == "generative":
+        # the defaultdicts can't be sent to worker processes, and the missing keys are never looked up anyways
+        converted_field_keys = {
+            "primary": converted_field_keys["primary"],
+            "array": dict(converted_field_keys["array"]),
+            "object": {key: dict(row_keys) for key, row_keys in converted_field_keys["object"].items()},
+        }
+        label_files = [file for file in list_dataset_files(temp_source_dir) if file.endswith(LABELS_JSON)]
+        run_for_each_label_file(convert_unified_schema_labels_file, label_files, temp_source_dir, temp_dir, converted_field_keys)
 
     return removed_signatures
 
-def running_cu_conversion(temp_dir: Path, temp_target_dir: Path, DI_version: str, analyzer_prefix: str, removed_signatures: list) -> Tuple[dict, list]:
+def run_for_each_label_file(convert_label_file, label_files: list, *args) -> None:
+    """
+    Function to run a conversion for each of the labels.json files of a dataset
+    The labels.json files are independent, so they are converted in worker processes if there are enough of them and more than one CPU is available
+    Args:
+        convert_label_file: The module level function converting a single labels.json file, called with the file and args
+        label_files (list): The labels.json files to convert
+        args: The rest of the arguments of convert_label_file, which are the same for every file
+    """
+    cpu_count = os.cpu_count() or 1
+    if len(label_files) >= PARALLEL_LABELS_MIN_FILES and cpu_count > 1:
+        # sending the files in batches of about an eighth of each worker's share, so that small files don't cost a round-trip each
+        chunksize = max(1, len(label_files) // (8 * cpu_count))
+        with ProcessPoolExecutor() as executor:
+            # consuming the results raises the first error of the worker processes
+            list(executor.map(convert_label_file, label_files, *(repeat(arg) for arg in args), chunksize=chunksize))
+    else:
+        for label_file in label_files:
+            convert_label_file(label_file, *args)
+
+def convert_unified_schema_labels_file(file: str, temp_source_dir: Path, temp_dir: Path, converted_field_keys: dict) -> None:
+    """
+    Function to run the field type conversion for a DI 4.0 preview labels.json file
+    Args:
+        file (str): The name of the labels.json file
+        temp_source_dir (Path): The path to the source directory
+        temp_dir (Path): The path to the target directory
+        converted_field_keys (dict): The converted field keys to be used to update the labels
+    """
+    # running field type conversion for labels.json
+    labels = read_json(temp_source_dir / file, file)
+    field_type_conversion.update_unified_schema_labels(labels, converted_field_keys, temp_dir / file)
+    print(f"[yellow]Successfully handled field type conversion for {file}[/yellow]\n")
+
+def convert_neural_labels_file(file_path: Path, temp_target_dir: Path, fields_dict: dict, removed_signatures: list, pretty: bool) -> None:
+    """
+    Function to convert a DI 3.1/4.0 GA Custom Neural labels.json file to a CU labels.json file
+    Args:
+        file_path (Path): The path to the DI labels.json file
+        temp_target_dir (Path): The path to the target directory
+        fields_dict (dict): Dictionary of field names and types for the labels.json conversion
+        removed_signatures (list): The list of removed signatures that will not be used in the CU converter
+        pretty (bool): Whether to indent the converted file
+    """
+    cu_labels = cu_converter_neural.convert_di_labels_to_cu_neural(file_path, temp_target_dir, fields_dict, removed_signatures)
+    # run field type conversion of label files here, because will be easier after getting it into CU format
+    field_type_conversion.update_fott_labels(cu_labels, temp_target_dir / file_path.name, pretty)
+    print(f"[green]Successfully converted Document Intelligence labels.json to Content Understanding labels.json at {temp_target_dir/file_path.name}[/green]\n")
+
+def running_cu_conversion(temp_dir: Path, temp_target_dir: Path, DI_version: str, analyzer_prefix: str, removed_signatures: list, pretty: bool = False) -> Tuple[dict, list]:
     """
     Function to run the DI to CU conversion
     Args:
@@ -241,37 +333,40 @@ def running_cu_conversion(temp_dir: Path, temp_target_dir: Path, DI_version: str
         DI_version (str): The version of DI being used
         analyzer_prefix (str): The prefix for the analyzer name
         removed_signatures (list): The list of removed signatures that will not be used in the CU converter
+        pretty (bool): Whether to indent the converted files
     """
     # Creating a FieldDefinitons object to handle the converison of definitions in the fields.json
     field_definitions = FieldDefinitions()
-    for root, dirs, files in os.walk(temp_dir):
-        root_path = Path(root)  # Convert root to Path object for easier manipulation
-        # Converting fields to analyzer
-        fields_path = root_path / FIELDS_JSON
-
-        assert fields_path.exists(), "fields.json is needed. Fields.json is missing from the given dataset."
-        if DI_version == "generative":
-            analyzer_data = cu_converter_generative.convert_fields_to_analyzer(fields_path, analyzer_prefix, temp_target_dir, field_definitions)
-        elif DI_version == "neural":
-            analyzer_data, fields_dict = cu_converter_neural.convert_fields_to_analyzer_neural(fields_path, analyzer_prefix, temp_target_dir, field_definitions)
-
-        ocr_files = [] # List to store paths to pdf files to get OCR results from later
-        for file in files:
-            file_path = root_path / file
-            if (file_path.name == FIELDS_JSON or file_path.name == VALIDATION_TXT):
-                continue
-            # Converting DI labels to CU labels
-            if (file.endswith(LABELS_JSON)):
-                if DI_version == "generative":
-                    cu_converter_generative.convert_di_labels_to_cu(file_path, temp_target_dir)
-                elif DI_version == "neural":
-                    cu_labels = cu_converter_neural.convert_di_labels_to_cu_neural(file_path, temp_target_dir, fields_dict, removed_signatures)
-                    # run field type conversion of label files here, because will be easier after getting it into CU format
-                    field_type_conversion.update_fott_labels(cu_labels, temp_target_dir / file_path.name)
-                    print(f"[green]Successfully converted Document Intelligence labels.json to Content Understanding labels.json at {temp_target_dir/file_path.name}[/green]\n")
-            elif not file.endswith(OCR_JSON): # skipping over .orc.json files
-                shutil.copy(file_path, temp_target_dir) # Copying over main file
-                ocr_files.append(file_path) # Adding to list of files to run OCR on
+    # Converting fields to analyzer
+    fields_path = temp_dir / FIELDS_JSON
+
+    assert fields_path.exists(), "fields.json is needed. Fields.json is missing from the given dataset."
+    if DI_version == "generative":
+        analyzer_data = cu_converter_generative.convert_fields_to_analyzer(fields_path, analyzer_prefix, temp_target_dir, field_definitions, pretty)
+    elif DI_version == "neural":
+        analyzer_data, fields_dict = cu_converter_neural.convert_fields_to_analyzer_neural(fields_path, analyzer_prefix, temp_target_dir, field_definitions, pretty)
+
+    ocr_files = [] # List to store paths to pdf files to get OCR results from later
+    label_files = [] # List to store paths to labels.json files to convert once all files are listed
+    for file in list_dataset_files(temp_dir):
+        if (file == FIELDS_JSON or file == VALIDATION_TXT or file.endswith(OCR_JSON)): # skipping over .orc.json files
+            continue
+        file_path = temp_dir / file
+        if (file.endswith(LABELS_JSON)):
+            label_files.append(file_path)
+        else:
+            # Carrying over main file, hard linking it to avoid copying its content
+            try:
+                os.link(file_path, temp_target_dir / file)
+            except OSError: # e.g. if the temporary directories are on file systems without hard links
+                shutil.copy(file_path, temp_target_dir)
+            ocr_files.append(file_path) # Adding to list of files to run OCR on
+
+    # Converting DI labels to CU labels
+    if DI_version == "generative":
+        run_for_each_label_file(cu_converter_generative.convert_di_labels_to_cu, label_files, temp_target_dir, pretty)
+    elif DI_version == "neural":
+        run_for_each_label_file(convert_neural_labels_file, label_files, temp_target_dir, fields_dict, removed_signatures, pretty)
     return analyzer_data, ocr_files
 
 if __name__ == "__main__":
@@ -1,4 +1,6 @@
 class FieldDefinitions:
+    __slots__ = ("_definitions",)
+
     def __init__(self):
         self._definitions = {}
 
@@ -1,11 +1,11 @@
 # imports from built-in packages
-import json
 from collections import defaultdict
 from pathlib import Path
 from typing import Tuple
 
 # imports from same project
 from constants import CHECKED_SYMBOL, CONVERT_TYPE_MAP, FIELD_VALUE_MAP, SUPPORT_FIELD_TYPE, UNCHECKED_SYMBOL
+from json_io import write_json
 
 def update_unified_schema_fields(fields: dict) -> Tuple[dict, dict]:
     """
@@ -54,47 +54,103 @@ def _update_unified_schema_fields(field_object: dict) -> None:
         field_object (dict): The unified schema field object to be updated
     """
     original_type = field_object["type"]
-    field_object["type"] = CONVERT_TYPE_MAP[original_type] \
-        if original_type in CONVERT_TYPE_MAP else "string"
+    field_object["type"] = CONVERT_TYPE_MAP.get(original_type, "string")
 
 def update_unified_schema_labels(
-    labels: dict, converted_field_keys: list[str], output_path: Path
+    labels: dict, converted_field_keys: dict, output_path: Path
 ) -> None:
     """
     Update the unified schema labels to have the proper field types per the converted field keys
     Args:
         labels (dict): The unified schema labels to be updated
-        converted_field_keys (list[str]): The converted field keys to be used to update the labels
+        converted_field_keys (dict): The converted field keys to be used to update the labels
         output_path (Path): The path to the output file (i.e. the updated labels)
     """
+    # looking up the converted field keys once, instead of for every cell of every table
+    converted_primary_keys = set(converted_field_keys.get("primary", []))
+    converted_array_keys = converted_field_keys.get("array", {})
+    converted_object_keys = converted_field_keys.get("object", {})
     for label_key, label_object in labels["fieldLabels"].items():
-        if label_key in converted_field_keys.get("primary", []):
+        if label_key in converted_primary_keys:
             _update_unified_schema_labels(label_key, label_object)
-        elif label_object["type"] == "array" and label_key in converted_field_keys.get(
-            "array", {}
-        ):
+        elif label_object["type"] == "array" and label_key in converted_array_keys:
+            converted_column_keys = set(converted_array_keys[label_key])
             for sub_label_object in label_object["valueArray"]:
                 for _sub_label_key, _sub_label_object in sub_label_object[
                     "valueObject"
                 ].items():
-                    if _sub_label_key in converted_field_keys.get("array", {}).get(
-                        label_key, []
-                    ):
+                    if _sub_label_key in converted_column_keys:
                         _update_unified_schema_labels(_sub_label_key, _sub_label_object)
-        elif label_object["type"] == "object" and label_key in converted_field_keys.get(
-            "object", {}
-        ):
+        elif label_object["type"] == "object" and label_key in converted_object_keys:
+            converted_row_keys = converted_object_keys[label_key]
             for sub_label_key, sub_label_object in label_object["valueObject"].items():
+                converted_column_keys = set(converted_row_keys.get(sub_label_key, []))
                 for (
                     _sub_label_key,
                     _sub_label_object,
                 ) in sub_label_object["valueObject"].items():
-                    if _sub_label_key in converted_field_keys.get("object", {}).get(
-                        label_key, {}
-                    ).get(sub_label_key, []):
+                    if _sub_label_key in converted_column_keys:
                         _update_unified_schema_labels(_sub_label_key, _sub_label_object)
-    with open(str(output_path), "w") as fp:
-        json.dump(labels, fp, ensure_ascii=True, indent=4)
+    write_json(output_path, labels)
+
+def _convert_currency_label(label_object: dict) -> None:
+    """
+    Helper function to convert a currency label object to a number label object
+    Args:
+        label_object (dict): The unified schema label object to be converted
+    """
+    try:
+        label_object["valueNumber"] = label_object["valueCurrency"]["amount"]
+    except KeyError:
+        try:
+            label_object["valueNumber"] = float(
+                label_object["content"].replace(",", "")
+            )
+        except Exception as e:
+            print(f"Error converting currency: {e}")
+
+    label_object["type"] = "number"
+
+def _convert_selection_mark_label(label_object: dict) -> None:
+    """
+    Helper function to convert a selection mark label object to a boolean label object
+    Args:
+        label_object (dict): The unified schema label object to be converted
+    """
+    if label_object["content"] in SELECTED_CONTENTS:
+        label_object["valueBoolean"] = True
+        label_object["content"] = CHECKED_SYMBOL
+    else:
+        label_object["valueBoolean"] = False
+        label_object["content"] = UNCHECKED_SYMBOL
+    label_object["type"] = "boolean"
+
+def _convert_string_label(label_object: dict) -> None:
+    """
+    Helper function to set the value of a string label object to its content
+    Args:
+        label_object (dict): The unified schema label object to be converted
+    """
+    label_object["valueString"] = label_object["content"]
+
+def _convert_other_label(label_object: dict) -> None:
+    """
+    Helper function to convert a label object of any other type to a string label object
+    Args:
+        label_object (dict): The unified schema label object to be converted
+    """
+    label_object["type"] = "string"
+    label_object["valueString"] = label_object["content"]
+
+# contents of selection marks that are selected
+SELECTED_CONTENTS = {"selected", ":selected:"}
+
+# label types with their own conversion, all other types are converted to strings
+LABEL_TYPE_CONVERTERS = {
+    "currency": _convert_currency_label,
+    "selectionMark": _convert_selection_mark_label,
+    "string": _convert_string_label,
+}
 
 def _update_unified_schema_labels(label_key: str, label_object: dict) -> None:
     """
@@ -106,31 +162,7 @@ def _update_unified_schema_labels(label_key: str, label_object: dict) -> None:
     value_key = FIELD_VALUE_MAP.get(label_object["type"])
     if value_key is None:
         print(f"Unsupported field type: '{label_object['type']}'")
-    if label_object["type"] == "currency":
-        try:
-            label_object["valueNumber"] = label_object["valueCurrency"]["amount"]
-        except KeyError:
-            try:
-                label_object["valueNumber"] = float(
-                    label_object["content"].replace(",", "")
-                )
-            except Exception as e:
-                print(f"Error converting currency: {e}")
-
-        label_object["type"] = "number"
-    elif label_object["type"] == "selectionMark":
-        if label_object["content"] in ["selected", ":selected:"]:
-            label_object["valueBoolean"] = True
-            label_object["content"] = CHECKED_SYMBOL
-        else:
-            label_object["valueBoolean"] = False
-            label_object["content"] = UNCHECKED_SYMBOL
-        label_object["type"] = "boolean"
-    elif label_object["type"] == "string":
-        label_object["valueString"] = label_object["content"]
-    else:
-        label_object["type"] = "string"
-        label_object["valueString"] = label_object["content"]
+    LABEL_TYPE_CONVERTERS.get(label_object["type"], _convert_other_label)(label_object)
     label_object.pop(value_key) if value_key in label_object else None
 
 def update_fott_fields(fields: dict) -> Tuple[list, dict]:
@@ -157,26 +189,25 @@ def update_fott_fields(fields: dict) -> Tuple[list, dict]:
     for i, field in enumerate(new_fields):
         if field["fieldType"] not in SUPPORT_FIELD_TYPE:
             original_type = field["fieldType"]
-            field["fieldType"] = CONVERT_TYPE_MAP[original_type] \
-                if original_type in CONVERT_TYPE_MAP else "string"
+            field["fieldType"] = CONVERT_TYPE_MAP.get(original_type, "string")
 
     if "definitions" in fields:
         for field_key, field_definition in fields["definitions"].items():
             for field in field_definition.get("fields", []):
                 if field["fieldType"] not in SUPPORT_FIELD_TYPE and field["fieldType"] != "signature":
                     original_type = field["fieldType"]
-                    field["fieldType"] = CONVERT_TYPE_MAP[original_type] \
-                        if original_type in CONVERT_TYPE_MAP else "string"
+                    field["fieldType"] = CONVERT_TYPE_MAP.get(original_type, "string")
 
     fields["fields"] = new_fields
     return signatures, fields
 
-def update_fott_labels(labels: dict, output_path: Path) -> None:
+def update_fott_labels(labels: dict, output_path: Path, pretty: bool = False) -> None:
      """
      Update the FOTT labels to have the proper field types
      Args:
          labels (dict): The FOTT labels to be updated
          output_path (Path): The path to the output file (i.e. the updated labels)
+         pretty (bool): Whether to indent the output file
      """
      for label_key, label_object in labels["fieldLabels"].items():
         if label_object["type"] == "array":
@@ -189,8 +220,7 @@ def update_fott_labels(labels: dict, output_path: Path) -> None:
                     _update_boolean_label(col_key, col_object)
         else:
             _update_boolean_label(label_key, label_object)
-     with open(str(output_path), "w") as fp:
-        json.dump(labels, fp, ensure_ascii=False, indent=4)
+     write_json(output_path, labels, pretty)
 
 def _update_boolean_label(label_key: str, label_object: dict) -> None:
     """
@@ -200,7 +230,7 @@ def _update_boolean_label(label_key: str, label_object: dict) -> None:
         label_object (dict): The FOTT label object to be updated
     """
     if label_object["type"] == "boolean":
-        if label_object["valueBoolean"] in ["selected", ":selected:"]:
+        if label_object["valueBoolean"] in SELECTED_CONTENTS:
             label_object["valueBoolean"] = True
         else:
             label_object["valueBoolean"] = False
@@ -1,10 +1,10 @@
 # imports from built-in packages
-from datetime import datetime, timedelta, timezone
-import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 from pathlib import Path
 import random
 import sys
+import threading
 import time
 from typing import Optional
 
@@ -12,8 +12,30 @@ from typing import Optional
 from azure.identity import DefaultAzureCredential
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
 from rich import print  # For colored output
 import typer
+from urllib3.util.retry import Retry
+
+# imports from same project
+from constants import MAX_OCR_CONCURRENCY, POLL_INITIAL_INTERVAL_SECONDS, POLL_MAX_INTERVAL_SECONDS
+from json_io import write_json
+
+# buffer (in seconds) to refresh the token before it expires
+TOKEN_REFRESH_BUFFER_SECONDS = 60
+
+# token shared by all of the threads running CU Layout, so that only one of them refreshes it when it expires
+_shared_token = None
+_token_lock = threading.Lock()
+
+# Shared session so that the analyze and polling requests of all of the files reuse the same connections,
+# with enough pooled connections for every file being analyzed at the same time
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=MAX_OCR_CONCURRENCY,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504), respect_retry_after_header=True, raise_on_status=False),
+))
 
 def is_token_expired(token) -> bool:
     """
@@ -23,12 +45,9 @@ def is_token_expired(token) -> bool:
     Returns:
         bool: True if the token is expired or about to expire, False otherwise.
     """
-    # Get the current time in UTC
-    current_time = datetime.now(timezone.utc).timestamp()
-    # Add a buffer (e.g., 60 seconds) to refresh the token before it expires
-    buffer_time = 60
     # Check if the token is expired or about to expire
-    return current_time >= (token.expires_on - buffer_time)
+    # expires_on is a POSIX timestamp, so it is compared to time.time() without creating a datetime
+    return time.time() >= (token.expires_on - TOKEN_REFRESH_BUFFER_SECONDS)
 
 def get_token(credential, current_token = None) -> str:
     """
@@ -39,13 +58,37 @@ def get_token(credential, current_token = None) -> str:
     Returns:
         str: The new access token.
     """
+    global _shared_token
     # Refresh token if it's expired or about to expire
     if current_token is None or is_token_expired(current_token):
-        # Refresh the token
-        current_token = credential.get_token("https://cognitiveservices.azure.com/.default")
-        print("Successfully refreshed token")
+        with _token_lock:
+            # another thread may have refreshed the token while this one was waiting for the lock
+            if _shared_token is None or is_token_expired(_shared_token):
+                # Refresh the token
+                _shared_token = credential.get_token("https://cognitiveservices.azure.com/.default")
+                print("Successfully refreshed token")
+            current_token = _shared_token
     return current_token
 
+def get_polling_interval(attempt: int, response_headers) -> float:
+    """
+    Get the number of seconds to wait before the next polling attempt
+    The interval doubles with every attempt up to POLL_MAX_INTERVAL_SECONDS with a +/-20% jitter, unless the service sends a Retry-After header
+    Args:
+        attempt (int): The zero-based number of the polling attempt
+        response_headers: The headers of the last polling response
+    Returns:
+        float: The number of seconds to wait
+    """
+    retry_after = response_headers.get("Retry-After")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    interval = min(POLL_MAX_INTERVAL_SECONDS, POLL_INITIAL_INTERVAL_SECONDS * 2 ** attempt)
+    return interval * random.uniform(0.8, 1.2)
+
 def build_analyzer(credential, current_token, host, api_version, subscriptionKey) -> str:
     """
     Function to create an analyzer with empty schema to get CU Layout results
@@ -87,7 +130,7 @@ def build_analyzer(credential, current_token, host, api_version, subscriptionKey
     }
     endpoint = f"{host}/contentunderstanding/analyzers/{analyzer_id}?api-version={api_version}"
     print("[yellow]Creating sample analyzer to attain CU Layout results...[/yellow]")
-    response = requests.put(
+    response = SESSION.put(
         url=endpoint,
         headers=headers,
         json=request_body,
@@ -97,8 +140,9 @@ def build_analyzer(credential, current_token, host, api_version, subscriptionKey
     if not operation_location:
         print("Error: 'Operation-Location' header is missing.")
 
+    attempt = 0
     while True:
-        poll_response = requests.get(operation_location, headers=headers)
+        poll_response = SESSION.get(operation_location, headers=headers)
         poll_response.raise_for_status()
 
         result = poll_response.json()
@@ -112,16 +156,19 @@ def build_analyzer(credential, current_token, host, api_version, subscriptionKey
             break
         else:
             print(".", end="", flush=True)
-            time.sleep(0.5)
+            time.sleep(get_polling_interval(attempt, poll_response.headers))
+            attempt += 1
     return analyzer_id
 
-def run_cu_layout_ocr(input_files: list, output_dir_string: str, subscription_key: str) -> None:
+def run_cu_layout_ocr(input_files: list, output_dir_string: str, subscription_key: str, max_concurrent: int = 4, pretty: bool = False) -> None:
     """
     Function to run the CU Layout OCR on the list of pdf files and write to the given output directory
     Args:
         input_files (list): List of input PDF files to process.
         output_dir_string (str): Path to the output directory where results will be saved.
         subscription_key (str): The subscription key for the Cognitive Services API.
+        max_concurrent (int): The number of files to run CU Layout on at the same time, up to MAX_OCR_CONCURRENCY.
+        pretty (bool): Whether to indent the result.json files.
     """
 
     print("Running CU Layout OCR...")
@@ -142,51 +189,74 @@ def run_cu_layout_ocr(input_files: list, output_dir_string: str, subscription_ke
     analyzer_id = build_analyzer(credential, current_token, host, api_version, subscription_key)
     url = f"{host}/contentunderstanding/analyzers/{analyzer_id}:analyze?api-version={api_version}"
 
-    for file in input_files:
-        try:
-            file = Path(file)
-            print(f"\nProcessing file: {file.name}")
-            # Get a valid token
-            current_token = get_token(credential, current_token)
-            headers = {
-                "Authorization": f"Bearer {current_token.token}",
-                "Apim-Subscription-id": f"{subscription_key}",
-                "Content-Type": "application/pdf",
-            }
-
-            with open(file, "rb") as f:
-                response = requests.post(url=url, data=f, headers=headers)
-            response.raise_for_status()
-
-            operation_location = response.headers.get("Operation-Location")
-            if not operation_location:
-                print("Error: 'Operation-Location' header is missing.")
-                continue
-
-            print(f"Polling results from: {operation_location}")
-            while True:
-                 # Refresh the token if necessary
+    # each file spends most of its time waiting on the service, so several files are analyzed at a time
+    max_workers = max(1, min(max_concurrent, MAX_OCR_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_process_one, Path(file), url, output_dir, credential, subscription_key, pretty) for file in input_files]
+        for future in as_completed(futures):
+            file, status, output = future.result()
+            if status == "succeeded":
+                print(f"[green]Success: Results of {file.name} saved to {output}[/green]")
+            elif status == "failed":
+                print(f"[red]Failed: {output}[/red]")
+            else:
+                print(output)
+
+def _process_one(file: Path, url: str, output_dir: Path, credential, subscription_key: str, pretty: bool = False) -> tuple:
+    """
+    Helper function to run the CU Layout OCR on a single pdf file and write the result to the given output directory
+    Args:
+        file (Path): The input PDF file to process.
+        url (str): The analyze URL of the analyzer with empty schema.
+        output_dir (Path): Path to the output directory where the result will be saved.
+        credential: The Azure credential object to use for authentication.
+        subscription_key (str): The subscription key for the Cognitive Services API.
+        pretty (bool): Whether to indent the result.json file.
+    Returns:
+        tuple: The file, the status ("succeeded", "failed" or "error"), and the output file or error
+    """
+    try:
+        print(f"Processing file: {file.name}")
+        # Get a valid token
+        current_token = get_token(credential)
+        headers = {
+            "Authorization": f"Bearer {current_token.token}",
+            "Apim-Subscription-id": f"{subscription_key}",
+            "Content-Type": "application/pdf",
+        }
+
+        with open(file, "rb") as f:
+            response = SESSION.post(url=url, data=f, headers=headers)
+        response.raise_for_status()
+
+        operation_location = response.headers.get("Operation-Location")
+        if not operation_location:
+            return file, "error", f"Error: 'Operation-Location' header is missing for file {file.name}."
+
+        print(f"Polling results of {file.name} from: {operation_location}")
+        attempt = 0
+        while True:
+            # Refresh the token only if it is about to expire during a long-running analyze operation
+            if is_token_expired(current_token):
                 current_token = get_token(credential, current_token)
-                poll_response = requests.get(operation_location, headers=headers)
-                poll_response.raise_for_status()
-
-                result = poll_response.json()
-                status = result.get("status", "").lower()
-
-                if status == "succeeded":
-                    output_file = output_dir / (file.name + ".result.json")
-                    with open(output_file, "w") as out_f:
-                        json.dump(result, out_f, indent=4)
-                    print(f"[green]Success: Results saved to {output_file}[/green]")
-                    break
-                elif status == "failed":
-                    print(f"[red]Failed: {result}[/red]")
-                    break
-                else:
-                    print(".", end="", flush=True)
-                    time.sleep(0.5)
-
-        except requests.RequestException as e:
-            print(f"Request error for file {file.name}: {e}")
-        except Exception as e:
-            print(f"Unexpected error for file {file.name}: {e}")
+                headers["Authorization"] = f"Bearer {current_token.token}"
+            poll_response = SESSION.get(operation_location, headers=headers)
+            poll_response.raise_for_status()
+
+            result = poll_response.json()
+            status = result.get("status", "").lower()
+
+            if status == "succeeded":
+                output_file = output_dir / (file.name + ".result.json")
+                write_json(output_file, result, pretty)
+                return file, status, output_file
+            elif status == "failed":
+                return file, status, result
+            else:
+                time.sleep(get_polling_interval(attempt, poll_response.headers))
+                attempt += 1
+
+    except requests.RequestException as e:
+        return file, "error", f"Request error for file {file.name}: {e}"
+    except Exception as e:
+        return file, "error", f"Unexpected error for file {file.name}: {e}"
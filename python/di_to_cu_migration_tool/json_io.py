@@ -0,0 +1,71 @@
+# imports from built-in packages
+import json
+import mmap
+import os
+from pathlib import Path
+import sys
+
+# imports from external packages (need to use pip install)
+from rich import print  # For colored output
+try:
+    import orjson  # C encoder/decoder, much faster than json for large ocr.json and labels.json files
+except ImportError:
+    orjson = None
+
+# minimum size of an input JSON file before it is memory-mapped instead of read
+MMAP_MIN_FILE_SIZE = 1 << 20
+
+def loads_json(data: bytes) -> dict:
+    """
+    Parse JSON from bytes, with orjson if it is installed.
+    Args:
+        data (bytes): The UTF-8 encoded JSON.
+    Returns:
+        dict: The parsed JSON data.
+    """
+    # both parsers take the raw UTF-8 bytes, so the data is never decoded to a str first
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def read_json(json_path: Path, file_description: str) -> dict:
+    """
+    Read a JSON file, with orjson if it is installed, and exit with an error if it is missing or invalid.
+    Args:
+        json_path (Path): Path to the JSON file.
+        file_description (str): Description of the file used in the error messages.
+    Returns:
+        dict: The parsed JSON data.
+    """
+    try:
+        with open(json_path, 'rb') as f:
+            if orjson is not None and os.fstat(f.fileno()).st_size >= MMAP_MIN_FILE_SIZE:
+                # large ocr.json files are parsed straight from the page cache, without reading them into a bytes copy
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file, memoryview(mapped_file) as view:
+                    return orjson.loads(view)
+            return loads_json(f.read())
+    except FileNotFoundError:
+        print(f"[red]Error: {file_description} file not found at {json_path}.[/red]")
+        sys.exit(1)
+    except json.JSONDecodeError: # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+        print(f"[red]Error: Invalid JSON in {file_description}.[/red]")
+        sys.exit(1)
+
+def write_json(json_path: Path, data: dict, pretty: bool = False) -> None:
+    """
+    Write data to a JSON file as UTF-8, with orjson if it is installed.
+    The output is compact unless pretty is set, since the files are consumed by the CU service.
+    The file is written next to its destination first and then renamed over it, so it is never left partially written.
+    orjson only supports an indent of 2 spaces, so pretty output is indented by 2 instead of 4.
+    Args:
+        json_path (Path): Path to the output JSON file.
+        data (dict): The data to write.
+        pretty (bool): Whether to indent the output for readability.
+    """
+    # the whole payload is serialized first and written with a single call, instead of json.dump's many small writes
+    if orjson is None:
+        payload = json.dumps(data, indent=2 if pretty else None, ensure_ascii=False).encode("utf-8")
+    else:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else None)
+    json_path = Path(json_path)
+    temp_path = json_path.with_name(json_path.name + ".tmp")
+    temp_path.write_bytes(payload)
+    os.replace(temp_path, json_path)
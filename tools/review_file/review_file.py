@@ -1,15 +1,17 @@
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 import re
 import requests
 import sys
+import threading
 import time
 from io import StringIO
 from typing import Optional, List, Dict, Any
 
 from azure.identity import DefaultAzureCredential, get_bearer_token_provider
 from dotenv import load_dotenv
-from github import Github, PullRequest
+from github import Github, GithubException, PullRequest
 from openai import AzureOpenAI
 from unidiff.patch import PatchSet, Hunk, Line
 
@@ -28,6 +30,11 @@ BRANCH_NAME: Optional[str] = os.getenv("BRANCH_NAME")
 TARGET_FILE: Optional[str] = os.getenv("INPUT_FILE_PATH")
 USER_INSTRUCTIONS: str = os.getenv("USER_INSTRUCTIONS", "").strip()
 ENABLE_REVIEW_CHANGES: bool = os.getenv("ENABLE_REVIEW_CHANGES", "true").lower() == "true"
+MAX_LLM_CONCURRENCY: int = max(1, int(os.getenv("MAX_LLM_CONCURRENCY", "8")))
+LLM_SECTIONS_PER_REQUEST: int = max(1, int(os.getenv("LLM_SECTIONS_PER_REQUEST", "8")))
+
+# Hunk header of a unified diff, e.g., @@ -1,4 +1,5 @@, capturing the first line number in the new file
+HUNK_HEADER_PATTERN = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)')
 
 if not all([
     AZURE_OPENAI_ENDPOINT,
@@ -124,67 +131,89 @@ def run_llm_review(
 
     return response.choices[0].message.content, llm_review_details
 
-def run_llm_comment_on_patch(patch: str) -> tuple[str, Optional[int]]:
+def run_llm_comment_on_patches(patches: List[str]) -> tuple[List[str], Optional[int]]:
     """
-    Use LLM to analyze a code patch and provide a concise comment
-    on the rationale and impact of the changes.
+    Use LLM to analyze several code patches in a single request and provide a concise comment
+    on the rationale and impact of the changes of each patch.
+    Returns the comments in the same order as the patches (empty if none was given).
     """
+    sections_prompt = "".join(
+        f"### Section {section_id}\n```\n{patch}\n```\n\n"
+        for section_id, patch in enumerate(patches)
+    )
     prompt = (
         f"You are a technical documentation reviewer.\n"
-        f"Below is a code section (unified diff format) from a pull request:\n\n"
-        f"```\n{patch}\n```\n\n"
+        f"Below are {len(patches)} code sections (unified diff format) from a pull request:\n\n"
+        f"{sections_prompt}"
         f"These changes were made by a previous editor to improve the code or documentation.\n"
-        f"Your task is to summarize each significant change using the following format:\n"
+        f"Your task is to summarize each significant change of each section using the following format:\n"
         f"- **categories**: [One or more of the following labels: "
         f"**Typo Fix**, **Grammar**, **Clarity**, **Consistency**, **Formatting**]\n"
         f"  - **change**: [Brief description of the modification]\n"
         f"  - **rationale**: [Explanation of why this change was made]\n"
         f"  - **impact**: [How this change improves the code or documentation]\n\n"
-        f"Do not suggest any additional edits or improvements\n"
+        f"Do not suggest any additional edits or improvements\n\n"
+        f"Output:\n"
+        f"Return a JSON object of the form "
+        f'{{"comments": [{{"id": <section number>, "body": "<summary in the format above>"}}]}}, '
+        f"with one entry per section.\n"
     )
 
     try:
         response = client.chat.completions.create(
             model=AZURE_OPENAI_DEPLOYMENT,
             messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
         )
     except Exception as e:
         print(f"❌ LLM patch comment failed: {e}")
-        return ""
+        return [""] * len(patches), None
 
     total_token_usage = getattr(response.usage, 'total_tokens')
     print(
-        f"🤖 LLM change comment received, total token usage: "
+        f"🤖 LLM change comments received for {len(patches)} sections, total token usage: "
         f"{total_token_usage if total_token_usage is not None else 'N/A'}"
     )
-    return response.choices[0].message.content, total_token_usage
 
-def find_position_in_pr(pr: PullRequest.PullRequest, filename: str, line_number: int) -> Optional[int]:
+    comments = [""] * len(patches)
+    try:
+        for comment in json.loads(response.choices[0].message.content).get("comments", []):
+            section_id = int(comment["id"])
+            if 0 <= section_id < len(patches):
+                comments[section_id] = str(comment.get("body", ""))
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        print(f"⚠️ Failed to parse LLM patch comments: {e}")
+    return comments, total_token_usage
+
+def build_position_index(pr: PullRequest.PullRequest) -> Dict[str, Dict[int, int]]:
     """
-    Returns the position in the diff for a given line number in a file.
+    Map every added line of every file in the PR to its position in the diff.
     GitHub API requires 'position' in diff, not line number.
+    The files are fetched and their patches parsed once, so each section looks up its position directly.
     """
+    position_index: Dict[str, Dict[int, int]] = {}
     for f in pr.get_files():
-        if f.filename == filename and f.patch:
-            lines = f.patch.split('\n')
-            position = 0
-            current_line = None
-            for l in lines:
-                position += 1
-                if l.startswith('@@'):
-                    # Parse the line number range, e.g., @@ -1,4 +1,5 @@
-                    m = re.search(r'\+(\d+)', l)
-                    if m:
-                        current_line = int(m.group(1)) - 1
-                elif l.startswith('+'):
-                    if current_line is not None:
-                        current_line += 1
-                        if current_line == line_number:
-                            return position
-                elif not l.startswith('-'):
-                    if current_line is not None:
-                        current_line += 1
-    return None  # Not found
+        if not f.patch:
+            continue
+        line_positions = position_index.setdefault(f.filename, {})
+        position = 0
+        current_line = None
+        for l in f.patch.split('\n'):
+            position += 1
+            if l.startswith('@@'):
+                # Parse the line number range, e.g., @@ -1,4 +1,5 @@
+                m = HUNK_HEADER_PATTERN.match(l)
+                if m:
+                    current_line = int(m.group(1)) - 1
+            elif l.startswith('+'):
+                if current_line is not None:
+                    current_line += 1
+                    # keep the first position, as the search over the patch used to return the first match
+                    line_positions.setdefault(current_line, position)
+            elif not l.startswith('-'):
+                if current_line is not None:
+                    current_line += 1
+    return position_index
 
 def group_changed_sections(hunk: Hunk, max_context_gap: int = 2) -> List[List[Line]]:
     """
@@ -252,41 +281,58 @@ def review_changes_and_comment_by_section(pr: PullRequest.PullRequest) -> None:
         return
 
     patch_set = PatchSet(StringIO(diff_text))
+    position_index = build_position_index(pr)
     review_comments: List[Dict[str, Any]] = []
     review_token_usage: int = 0
 
+    sections_to_comment: List[tuple[str, List[Line], str]] = []
     for patched_file in patch_set:
         filename = patched_file.path
         if patched_file.is_removed_file:
             continue
 
         for hunk in patched_file:
-            changed_sections = group_changed_sections(hunk)
-
-            for section in changed_sections:
+            for section in group_changed_sections(hunk):
                 section_text = "".join(str(line) for line in section)
-                comment, comment_token_usage = run_llm_comment_on_patch(section_text)
-                review_token_usage += comment_token_usage if comment_token_usage else 0
-                if comment.strip():
-                    last_line = next((l for l in reversed(section) if l.is_added), None)
-                    if not last_line:
-                        print(
-                            f"⚠️ Skipping section in `{filename}` — "
-                            f"no added lines found:\n{section_text}"
-                        )
-                        continue
-                    position = find_position_in_pr(pr, filename, last_line.target_line_no)
-                    if position:
-                        review_comments.append({
-                            "path": filename,
-                            "position": position,
-                            "body": comment.strip()
-                        })
-                    else:
-                        print(
-                            f"⚠️ Unable to determine position for comment in `{filename}` "
-                            f"at line {last_line.target_line_no}."
-                        )
+                sections_to_comment.append((filename, section, section_text))
+
+    # Sections are commented on in batches, each batch being a single LLM round-trip, and several batches at a time.
+    # Positions are looked up afterwards one by one, since PyGithub objects are not thread-safe.
+    # Identical sections (e.g., the same fix repeated across files) are only sent once, and share the comment.
+    section_texts = list(dict.fromkeys(section_text for _, _, section_text in sections_to_comment))
+    batches = [
+        section_texts[i:i + LLM_SECTIONS_PER_REQUEST]
+        for i in range(0, len(section_texts), LLM_SECTIONS_PER_REQUEST)
+    ]
+    section_comments: List[str] = []
+    with ThreadPoolExecutor(max_workers=MAX_LLM_CONCURRENCY) as executor:
+        for batch_comments, batch_token_usage in executor.map(run_llm_comment_on_patches, batches):
+            section_comments.extend(batch_comments)
+            review_token_usage += batch_token_usage if batch_token_usage else 0
+    comments_by_text = dict(zip(section_texts, section_comments))
+
+    for filename, section, section_text in sections_to_comment:
+        comment = comments_by_text[section_text]
+        if comment.strip():
+            last_line = next((l for l in reversed(section) if l.is_added), None)
+            if not last_line:
+                print(
+                    f"⚠️ Skipping section in `{filename}` — "
+                    f"no added lines found:\n{section_text}"
+                )
+                continue
+            position = position_index.get(filename, {}).get(last_line.target_line_no)
+            if position:
+                review_comments.append({
+                    "path": filename,
+                    "position": position,
+                    "body": comment.strip()
+                })
+            else:
+                print(
+                    f"⚠️ Unable to determine position for comment in `{filename}` "
+                    f"at line {last_line.target_line_no}."
+                )
 
     if review_comments:
         print(f"📝 Submitting {len(review_comments)} section-level comments to {pr.html_url}")
@@ -324,31 +370,70 @@ def main() -> None:
     try:
         blob = repo.get_contents(TARGET_FILE, ref=base_branch)
         orig_content = blob.decoded_content.decode()
+        # the new branch starts at the base branch, so the file has the same blob SHA there
+        orig_sha = blob.sha
     except Exception as e:
         print(f"❌ Failed to fetch file `{TARGET_FILE}`: {e}")
         sys.exit(1)
 
+    new_branch = f"review-{base_branch}-{TARGET_FILE.replace('/', '-')}-{int(time.time())}"
+    # The branch does not depend on the review, so it is created while the LLM review is running.
+    # The review runs on a daemon thread, so that a failure to create the branch exits without waiting for it
+    # (worker threads of a ThreadPoolExecutor are always joined at exit).
+    review_outcome: Dict[str, Any] = {}
+
+    def review() -> None:
+        try:
+            review_outcome["result"] = run_llm_review(TARGET_FILE, orig_content, USER_INSTRUCTIONS)
+        except BaseException as e:
+            review_outcome["error"] = e
+
     print("🤖 Running LLM review...")
-    updated_content, llm_review_details = run_llm_review(TARGET_FILE, orig_content, USER_INSTRUCTIONS)
+    review_thread = threading.Thread(target=review, daemon=True)
+    review_thread.start()
 
-    new_branch = f"review-{base_branch}-{TARGET_FILE.replace('/', '-')}-{int(time.time())}"
     print(f"🌿 Creating new branch `{new_branch}`...")
     try:
-        repo.create_git_ref(ref=f"refs/heads/{new_branch}", sha=base_sha)
+        new_ref = repo.create_git_ref(ref=f"refs/heads/{new_branch}", sha=base_sha)
     except Exception as e:
         print(f"❌ Failed to create new branch `{new_branch}`: {e}")
         sys.exit(1)
 
+    try:
+        review_thread.join()
+        if "error" in review_outcome:
+            raise review_outcome["error"]
+        updated_content, llm_review_details = review_outcome["result"]
+    except BaseException:
+        # the review failed (or was interrupted), so the branch would never be used
+        try:
+            new_ref.delete()
+        except Exception as e:
+            print(f"⚠️ Failed to delete unused branch `{new_branch}`: {e}")
+        raise
+
     print(f"✍️ Committing updated file to `{new_branch}`...")
     try:
-        file = repo.get_contents(TARGET_FILE, ref=new_branch)
-        repo.update_file(
-            path=TARGET_FILE,
-            message=f"docs: review {TARGET_FILE}",
-            content=updated_content,
-            sha=file.sha,
-            branch=new_branch
-        )
+        try:
+            repo.update_file(
+                path=TARGET_FILE,
+                message=f"docs: review {TARGET_FILE}",
+                content=updated_content,
+                sha=orig_sha,
+                branch=new_branch
+            )
+        except GithubException as e:
+            # the base branch moved between fetching the file and creating the branch, so the SHA is stale
+            if e.status not in (409, 422):
+                raise
+            file = repo.get_contents(TARGET_FILE, ref=new_branch)
+            repo.update_file(
+                path=TARGET_FILE,
+                message=f"docs: review {TARGET_FILE}",
+                content=updated_content,
+                sha=file.sha,
+                branch=new_branch
+            )
     except Exception as e:
         print(f"❌ Failed to commit updated file: {e}")
         sys.exit(1)
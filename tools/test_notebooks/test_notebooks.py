@@ -1,31 +1,125 @@
+import hashlib
+import json
+import multiprocessing
 import os
+import subprocess
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Tuple, Optional, List
-
-import nbformat
-from nbconvert.preprocessors import ExecutePreprocessor
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, Tuple, Optional, List
 
 
 SINGLE_NOTEBOOK_TIMEOUT = 1200
 CONCURRENT_WORKERS = 4
+KERNEL_NAME = "python3"
+NOTEBOOK_CACHE_DIR = ".nb_exec_cache"
+NOTEBOOK_CACHE_MAX_AGE_DAYS = 7
 
 
 def should_skip(notebook_path: str, skip_list: List[str]) -> bool:
     return any(skip in notebook_path for skip in skip_list)
 
 
-def run_notebook(notebook_path: str, root: str) -> Tuple[bool, Optional[str]]:
-    """Execute a single notebook."""
+def iter_notebooks(path: str, skip_list: Tuple[str, ...]) -> Iterator[str]:
+    """Yield the notebooks under a directory as they are found, pruning hidden and skipped directories."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if should_skip(entry.path, skip_list):
+                print(f"⏭️ Skipped: {entry.path}")
+                continue
+            if entry.is_dir():
+                yield from iter_notebooks(entry.path, skip_list)
+            elif entry.name.endswith(".ipynb") and entry.is_file():
+                yield entry.path
+
+
+def notebook_cache_key(notebook_path: str, cells: List[dict]) -> str:
+    """Hash the code of a notebook together with its path, kernel and Python version."""
+    code_sources = [
+        "".join(cell.get("source") or "")
+        for cell in cells
+        if cell.get("cell_type") == "code"
+    ]
+    key = json.dumps([os.path.abspath(notebook_path), KERNEL_NAME, sys.version, code_sources])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def prune_notebook_cache(cache_dir: str, max_age_days: int=NOTEBOOK_CACHE_MAX_AGE_DAYS) -> None:
+    """Remove the cache entries of notebook runs older than max_age_days."""
+    if not os.path.isdir(cache_dir):
+        return
+    oldest = time.time() - max_age_days * 24 * 60 * 60
+    with os.scandir(cache_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.stat().st_mtime < oldest:
+                os.remove(entry.path)
+
+
+def changed_notebooks(ref: str, path: str="notebooks") -> Optional[List[str]]:
+    """List the notebooks under path that changed since ref, or None if git could not tell."""
+    try:
+        output = subprocess.check_output(
+            ["git", "diff", "--name-only", "--relative", "--diff-filter=d", f"{ref}...HEAD", "--", f"{path}/*.ipynb"],
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"⚠️ Could not list the notebooks changed since `{ref}`: {e}")
+        return None
+    return output.splitlines()
+
+
+def run_notebook(notebook_path: str, root: str, cache_dir: Optional[str]=None) -> Tuple[bool, Optional[str]]:
+    """Execute a single notebook, unless its code already ran successfully and is cached in cache_dir."""
     try:
         print(f"🔧 running: {notebook_path}")
+        if os.path.getsize(notebook_path) == 0:
+            return False, "Empty notebook file"
+
         with open(notebook_path, encoding="utf-8") as f:
-            nb = nbformat.read(f, as_version=4)
+            content = f.read()
+
+        # A notebook without any code to run passes without starting a kernel
+        # (only nbformat 4 notebooks have top-level cells, older ones are left to nbformat)
+        notebook_json = json.loads(content)
+        cells = notebook_json.get("cells")
+        if cells is not None and not any(
+            cell.get("cell_type") == "code" and "".join(cell.get("source") or "").strip()
+            for cell in cells
+        ):
+            print(f"⏭️ No code cells to run: {notebook_path}")
+            return True, None
+
+        cache_path = None
+        if cache_dir and cells is not None:
+            cache_path = os.path.join(cache_dir, f"{notebook_cache_key(notebook_path, cells)}.json")
+            if os.path.isfile(cache_path):
+                print(f"⏭️ Unchanged since its last successful run: {notebook_path}")
+                return True, None
+
+        # nbformat and nbconvert are slow to import, so they are only imported once a notebook has to run
+        import nbformat
+        from nbconvert.preprocessors import ExecutePreprocessor
+
+        # The JSON was already parsed above, so an nbformat 4 notebook is built from it instead of parsed again
+        if notebook_json.get("nbformat") == 4:
+            nb = nbformat.from_dict(notebook_json)
+        else:
+            nb = nbformat.reads(content, as_version=4)
+        # Only nb is needed from here on, so the raw text and JSON (with any saved outputs)
+        # are released instead of being held for the whole execution
+        del content, notebook_json, cells
 
         ep = ExecutePreprocessor(
             timeout=SINGLE_NOTEBOOK_TIMEOUT,
-            kernel_name="python3")
+            kernel_name=KERNEL_NAME)
         ep.preprocess(nb, {"metadata": {"path": root}})
+
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump({"notebook": notebook_path, "timestamp": time.time()}, f)
         return True, None
     except Exception as e:
         return False, str(e)
@@ -35,36 +129,35 @@ def run_all_notebooks(
         path: str=".",
         skip_list: List[str]=None,
         max_workers: int=CONCURRENT_WORKERS,
+        cache_dir: Optional[str]=None,
     ) -> None:
     abs_path = os.path.abspath(path)
     print(f"🔍 Scanning for notebooks in: {abs_path}\n")
 
-    skip_list = skip_list or []
-
-    notebook_paths: List[str] = []
-    for root, _, files in os.walk(abs_path):
-        for file in files:
-            if file.endswith(".ipynb") and not file.startswith("."):
-                full_path = os.path.join(root, file)
-                if should_skip(full_path, skip_list):
-                    print(f"⏭️ Skipped: {full_path}")
-                    continue
-                notebook_paths.append(full_path)
-
-    if not notebook_paths:
-        print("❌ No notebooks were found. Check the folder path or repo contents.")
-        sys.exit(1)
-
-    print(f"▶️ Running {len(notebook_paths)} notebooks using {max_workers} workers...\n")
+    skip_list = tuple(skip_list or [])
 
     success_notebooks: List[str] = []
     failed_notebooks: List[Tuple[str, str]] = []
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {
-            executor.submit(run_notebook, path, os.path.dirname(path)): path
-            for path in notebook_paths
-        }
+    print(f"▶️ Running notebooks using {max_workers} workers...\n")
+
+    # Each notebook runs in its own worker process, so the kernel message handling of one
+    # notebook does not contend for the GIL with the others.
+    # forkserver starts the workers from a clean process instead of forking this one, where available.
+    mp_context = (
+        multiprocessing.get_context("forkserver")
+        if "forkserver" in multiprocessing.get_all_start_methods()
+        else None
+    )
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+        # notebooks are submitted as they are found, so the first ones start while the scan continues
+        futures = {}
+        for notebook_path in iter_notebooks(abs_path, skip_list):
+            futures[executor.submit(run_notebook, notebook_path, os.path.dirname(notebook_path), cache_dir)] = notebook_path
+
+        if not futures:
+            print("❌ No notebooks were found. Check the folder path or repo contents.")
+            sys.exit(1)
 
         for future in as_completed(futures):
             notebook_path = futures[future]
@@ -98,13 +191,42 @@ def run_all_notebooks(
 if __name__ == "__main__":
     args: List[str] = sys.argv[1:]
 
+    # NOTE: "--jobs N" sets the number of notebooks run at the same time when scanning a directory
+    max_workers = CONCURRENT_WORKERS
+    if "--jobs" in args:
+        jobs_index = args.index("--jobs")
+        max_workers = max(1, int(args[jobs_index + 1]))
+        del args[jobs_index:jobs_index + 2]
+
+    # NOTE: "--cache" skips notebooks whose code is unchanged since their last successful run
+    cache_dir = None
+    if "--cache" in args:
+        args.remove("--cache")
+        cache_dir = NOTEBOOK_CACHE_DIR
+        prune_notebook_cache(cache_dir)
+
+    # NOTE: "--only-changed [REF]" only runs the notebooks changed since REF (default: main), falling back to all of them
+    if "--only-changed" in args:
+        changed_index = args.index("--only-changed")
+        ref = "main"
+        if changed_index + 1 < len(args) and not args[changed_index + 1].startswith("--"):
+            ref = args.pop(changed_index + 1)
+        args.pop(changed_index)
+        changed = changed_notebooks(ref)
+        if changed is not None:
+            if not changed:
+                print(f"🏁 No notebooks changed since `{ref}`.")
+                sys.exit(0)
+            print(f"🔍 Running the {len(changed)} notebooks changed since `{ref}`\n")
+            args = changed
+
     # NOTE: Define skip list (can use full paths or substrings)
     skip_list = [
         "build_person_directory.ipynb",  # Skip due to "new_face_image_path" needed to be added manually
     ]
 
     if not args:
-        run_all_notebooks("notebooks", skip_list=skip_list)
+        run_all_notebooks("notebooks", skip_list=skip_list, max_workers=max_workers, cache_dir=cache_dir)
     else:
         failed: List[Tuple[str, str]] = []
         for notebook_path in args:
@@ -114,7 +236,7 @@ if __name__ == "__main__":
 
             if notebook_path.endswith(".ipynb") and os.path.isfile(notebook_path):
                 print(f"▶️ Running: {notebook_path}")
-                success, error = run_notebook(notebook_path, os.path.dirname(notebook_path))
+                success, error = run_notebook(notebook_path, os.path.dirname(notebook_path), cache_dir)
                 if success:
                     print(f"✅ Success: {notebook_path}\n")
                 else: